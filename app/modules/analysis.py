@@ -1,69 +1,138 @@
 import pandas as pd
 import numpy as np
-import os
+import argparse
 
-def calculate_daily_losses(df, clipping_line=27.5):
+from storage import save_frame, load_frame, export_csv, frame_exists
+from workspace import get_workspace_folder
+from schema import day_numbers
+from cleaning import reading_hours
+from plant import DEFAULT_PLANT
+from instrumentation import logger
+
+# Rows processed per step of the loss kernel, so its temporaries stay small
+KERNEL_CHUNK_ROWS = 1 << 16
+
+# The limits are the clipping line in MWh for each reading: clipping_line (MW) * its hours
+def clipped_losses(energy, incremented, limits):
+    # Case 1: both below the clipping line -> incremented - energy
+    # Case 2: incremented above but energy below -> clipping_line - energy
+    # Case 3: energy above the clipping line -> no loss considered
+    return np.where(energy <= limits, np.minimum(incremented, limits) - energy, 0.0)
+
+def daily_loss_kernel(energy, incremented, day_codes, n_days, limits):
+    # Accumulate the per-row losses straight into one bin per day, a chunk of
+    # rows at a time, without keeping any full-length loss columns
+    loss_without = np.zeros(n_days)
+    loss_with = np.zeros(n_days)
+    for start in range(0, len(energy), KERNEL_CHUNK_ROWS):
+        stop = start + KERNEL_CHUNK_ROWS
+        chunk_energy = energy[start:stop]
+        chunk_incremented = incremented[start:stop]
+        chunk_codes = day_codes[start:stop]
+        chunk_limits = limits[start:stop]
+
+        loss_without += np.bincount(chunk_codes, weights=chunk_incremented - chunk_energy, minlength=n_days)
+        loss_with += np.bincount(chunk_codes, weights=clipped_losses(chunk_energy, chunk_incremented, chunk_limits), minlength=n_days)
+    return loss_without, loss_with
+
+def calculate_daily_losses(df, clipping_line=DEFAULT_PLANT.clipping_line):
+    # The input DataFrame is only read, never modified
     try:
-        print("Processing 'Date' column...")
-        df['Date'] = df['Date'].astype(str).str.split(' ').str[0]  # Extract date part as string
-        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
-        print("Successfully processed 'Date' column.")
+        logger.debug("Processing 'Date' column...")
+        dates = df['Date']
+        if not pd.api.types.is_datetime64_any_dtype(dates) and not pd.api.types.is_integer_dtype(dates):
+            dates = dates.astype(str).str.split(' ').str[0]  # Extract date part as string
+            dates = pd.to_datetime(dates, format='%Y-%m-%d')
+        logger.debug("Successfully processed 'Date' column.")
     except Exception as e:
-        print(f"Error processing 'Date' column: {e}")
+        logger.warning(f"Error processing 'Date' column: {e}")
         return None
     
-    print("Extracting 'Day' from 'Date' column...")
-    df['Day'] = df['Date'].dt.date  # Assign the date part to a new column
-    
-    df.columns = df.columns.str.strip()
+    columns = {col.strip(): col for col in df.columns}
     
-    required_columns = ['incremented_energy MWh', 'Energy MWh']
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    required_columns = ['incremented_energy MWh', 'Energy MWh', 'interval_minutes']
+    missing_columns = [col for col in required_columns if col not in columns]
     
     if missing_columns:
-        print(f"Missing columns: {missing_columns}")
+        logger.warning(f"Missing columns: {missing_columns}")
         return None
     
-    print("Calculating losses for each row...")
-    df['Loss Without Clipping'] = df['incremented_energy MWh'] - df['Energy MWh']
+    logger.debug("Extracting day numbers from 'Date' column...")
+    valid = dates.notna().to_numpy()
+    days = day_numbers(dates[valid])
+    energy = df[columns['Energy MWh']].to_numpy(dtype=np.float64)[valid]
+    incremented = df[columns['incremented_energy MWh']].to_numpy(dtype=np.float64)[valid]
+    limits = clipping_line * reading_hours(df)[valid]
     
-    df['Loss With Clipping'] = np.where(
-        (df['incremented_energy MWh'] <= clipping_line) & (df['Energy MWh'] <= clipping_line),
-        df['incremented_energy MWh'] - df['Energy MWh'],  # Case 1: Both below clipping line
-        np.where(
-            (df['incremented_energy MWh'] > clipping_line) & (df['Energy MWh'] <= clipping_line),
-            clipping_line - df['Energy MWh'],  # Case 2: Incremented above but Energy below
-            0  # Case 3: Both above clipping line, no loss considered
-        )
-    )
+    if len(days) == 0:
+        return pd.DataFrame({
+            'Day': pd.Series(dtype='datetime64[ns]'),
+            'Loss_Without_Clipping': pd.Series(dtype=np.float64),
+            'Loss_With_Clipping': pd.Series(dtype=np.float64),
+            'Loss_Difference': pd.Series(dtype=np.float64),
+        })
     
-    df['Loss Difference'] = df['Loss Without Clipping'] - df['Loss With Clipping']
+    first_day = days.min()
+    day_codes = days - first_day
+    n_days = int(day_codes.max()) + 1
     
-    print("Aggregating daily losses...")
-    daily_losses = df.groupby('Day').agg(
-        Loss_Without_Clipping=('Loss Without Clipping', 'sum'),
-        Loss_With_Clipping=('Loss With Clipping', 'sum'),
-        Loss_Difference=('Loss Difference', 'sum')
-    ).reset_index()
+    logger.debug("Calculating daily losses...")
+    loss_without, loss_with = daily_loss_kernel(energy, incremented, day_codes, n_days, limits)
     
-    print("Daily losses calculated successfully.")
+    # Keep only the days that have data, like a groupby would
+    present = np.bincount(day_codes, minlength=n_days) > 0
+    present_days = (np.flatnonzero(present) + first_day).astype('datetime64[D]')
+    daily_losses = pd.DataFrame({
+        'Day': present_days.astype('datetime64[ns]'),
+        'Loss_Without_Clipping': loss_without[present],
+        'Loss_With_Clipping': loss_with[present],
+        'Loss_Difference': loss_without[present] - loss_with[present],
+    })
+    
+    logger.debug("Daily losses calculated successfully.")
     return daily_losses
 
-try:
-    assets_folder = os.path.abspath(os.path.join(os.getcwd(), '../../assets'))
-    file_path = os.path.join(assets_folder, 'calculated_data.csv')
+# Function to load the calculated data saved by 'calculations.py'
+def load_calculated_data(name='calculated_data', fmt=None, folder=None):
+    if not frame_exists(name, fmt, folder):
+        raise FileNotFoundError("Calculated data not found in the assets folder. Run 'calculations.py' first.")
     
-    df_calculated = pd.read_csv(file_path)
-    print("Data loaded successfully from 'calculated_data.csv'.")
-except Exception as e:
-    print(f"Error loading data: {e}")
-    df_calculated = None
+    return load_frame(name, fmt, folder)
+
+# Function to save the daily losses
+def save_analysed_data(df, name='analysed_data', fmt=None, csv_export=False, folder=None):
+    file_path = save_frame(df, name, fmt, folder)
+    if csv_export:
+        export_csv(df, name, folder)
+    return file_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily energy loss analysis")
+    parser.add_argument('--clipping_line', type=float, default=DEFAULT_PLANT.clipping_line, help="Clipping line in MW")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default=None, help="Intermediate storage format")
+    parser.add_argument('--workspace', type=str, default=None, help="Keep the files in 'assets/workspaces/<name>' instead of the shared assets folder")
+    parser.add_argument('--export_csv', action='store_true', help="Also export the daily losses as CSV")
+    
+    args = parser.parse_args(argv)
+    folder = get_workspace_folder(args.workspace) if args.workspace else None
+
+    try:
+        df_calculated = load_calculated_data(fmt=args.format, folder=folder)
+        print("Calculated data loaded successfully.")
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return 1
+
+    results = calculate_daily_losses(df_calculated, args.clipping_line)
+    if results is None:
+        return 1
+
+    print("\nFinal Results:")
+    print(results)
+    results_file_path = save_analysed_data(results, fmt=args.format, csv_export=args.export_csv, folder=folder)
+    print(f"Results saved to '{results_file_path}'")
+    return 0
 
-if df_calculated is not None:
-    results = calculate_daily_losses(df_calculated)
-    if results is not None:
-        print("\nFinal Results:")
-        print(results)
-        results_file_path = os.path.join(assets_folder, 'analysed_data.csv')
-        results.to_csv(results_file_path, index=False)
-        print(f"Results saved to '{results_file_path}'")
+# Main entry point
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from pipeline import load_cleaned_data, run_calculations
+from sensitivity import sweep_clipping_lines
+from plant import PlantParameters, DEFAULT_PLANT
+from schema import day_numbers, day_number_to_date
+from cleaning import infer_interval_hours
+from storage import save_frame, export_csv, get_assets_folder
+
+# Batch runner for many plants. Each plant's workbook goes through
+# ingest -> clean -> calculate -> analyse in its own worker process. The
+# results are written as one consolidated table, and a plant that fails is
+# reported without stopping the others.
+#
+# With grid_increments and grid_clipping_lines set, every plant also gets the
+# total losses over that (increment, clipping line) grid for its date range,
+# for capacity planning. They are written as a third table.
+
+PLANT_DEFAULTS = {
+    'increment_value': 1.0,
+    'clipping_line': DEFAULT_PLANT.clipping_line,
+    'base_capacity': DEFAULT_PLANT.base_capacity,
+    'interval_hours': DEFAULT_PLANT.interval_hours,
+    'resample_minutes': DEFAULT_PLANT.resample_minutes,
+    'start_date': None,
+    'end_date': None,
+    'grid_increments': None,
+    'grid_clipping_lines': None,
+}
+
+SUMMARY_COLUMNS = [
+    'plant_id', 'status', 'error', 'workbook', 'increment_value', 'clipping_line', 'base_capacity',
+    'interval_hours', 'resample_minutes', 'rows', 'days', 'Loss_Without_Clipping', 'Loss_With_Clipping', 'Loss_Difference',
+    'ingest_seconds', 'calculation_seconds', 'total_seconds',
+]
+
+def available_cores():
+    # Respect CPU affinity limits (containers, taskset) where the platform exposes them
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Function to read the plant list from a manifest (.csv or .json) or a directory of workbooks
+def load_plants(source, defaults=None):
+    defaults = {**PLANT_DEFAULTS, **(defaults or {})}
+
+    if os.path.isdir(source):
+        workbooks = sorted(f for f in os.listdir(source) if f.lower().endswith(('.xlsx', '.xls')))
+        records = [{'workbook': os.path.join(source, f)} for f in workbooks]
+    else:
+        if source.lower().endswith('.json'):
+            with open(source) as f:
+                records = json.load(f)
+        else:
+            records = pd.read_csv(source).to_dict('records')
+
+        # Workbook paths in a manifest are relative to the manifest itself
+        manifest_folder = os.path.dirname(os.path.abspath(source))
+        for record in records:
+            record['workbook'] = os.path.join(manifest_folder, str(record['workbook']))
+
+    plants = []
+    for record in records:
+        plant = dict(defaults)
+        plant.update({key: value for key, value in record.items() if not (pd.api.types.is_scalar(value) and pd.isna(value))})
+        plant.setdefault('plant_id', os.path.splitext(os.path.basename(plant['workbook']))[0])
+        plants.append(plant)
+    return plants
+
+def _optional_float(value):
+    return None if value is None else float(value)
+
+# Function to read a list of numbers given as a list or a '10,20,30' string
+def _optional_floats(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [part for part in value.replace(';', ',').split(',') if part.strip()]
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return [float(part) for part in value] or None
+
+# Function run in a worker process for one plant; it never raises
+def process_plant(plant):
+    summary = {column: None for column in SUMMARY_COLUMNS}
+    summary.update({key: plant.get(key) for key in ('plant_id', 'workbook', 'increment_value', 'clipping_line', 'base_capacity', 'resample_minutes')})
+    daily_losses = None
+    grid = None
+    started = time.perf_counter()
+
+    try:
+        parameters = PlantParameters(
+            base_capacity=float(plant['base_capacity']),
+            clipping_line=float(plant['clipping_line']),
+            interval_hours=_optional_float(plant['interval_hours']),
+            resample_minutes=_optional_float(plant['resample_minutes']),
+        )
+        cleaned_df = load_cleaned_data(plant['workbook'], parameters)
+        ingested = time.perf_counter()
+        summary['interval_hours'] = infer_interval_hours(cleaned_df)
+
+        days = day_numbers(cleaned_df['Date'])
+        start_date = plant['start_date'] or day_number_to_date(days.min())
+        end_date = plant['end_date'] or day_number_to_date(days.max())
+        _, daily_losses = run_calculations(cleaned_df, float(plant['increment_value']), start_date, end_date, parameters)
+
+        grid_increments = _optional_floats(plant.get('grid_increments'))
+        grid_clipping_lines = _optional_floats(plant.get('grid_clipping_lines'))
+        if grid_increments or grid_clipping_lines:
+            grid = sweep_clipping_lines(
+                cleaned_df, grid_increments or [float(plant['increment_value'])],
+                grid_clipping_lines or [parameters.clipping_line], parameters, start_date, end_date
+            )
+            grid.insert(0, 'plant_id', plant['plant_id'])
+        finished = time.perf_counter()
+
+        summary.update({
+            'status': 'ok',
+            'rows': len(cleaned_df),
+            'days': len(daily_losses),
+            'Loss_Without_Clipping': daily_losses['Loss_Without_Clipping'].sum(),
+            'Loss_With_Clipping': daily_losses['Loss_With_Clipping'].sum(),
+            'Loss_Difference': daily_losses['Loss_Difference'].sum(),
+            'ingest_seconds': ingested - started,
+            'calculation_seconds': finished - ingested,
+        })
+        daily_losses.insert(0, 'plant_id', plant['plant_id'])
+    except Exception as e:
+        summary.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+
+    summary['total_seconds'] = time.perf_counter() - started
+    return summary, daily_losses, grid
+
+# Function to process all plants in a process pool and collect the results
+def run_batch(plants, max_workers=None):
+    max_workers = max_workers or min(available_cores(), max(len(plants), 1))
+    summaries = []
+    daily_parts = []
+    grid_parts = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_plant, plant): plant for plant in plants}
+        for future in as_completed(futures):
+            plant = futures[future]
+            try:
+                summary, daily_losses, grid = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. out of memory); report and go on
+                summary = {column: None for column in SUMMARY_COLUMNS}
+                summary.update({'plant_id': plant['plant_id'], 'workbook': plant['workbook'],
+                                'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+                daily_losses = grid = None
+
+            summaries.append(summary)
+            if daily_losses is not None:
+                daily_parts.append(daily_losses)
+            if grid is not None:
+                grid_parts.append(grid)
+            print(f"[{summary['status']}] {summary['plant_id']} in {summary['total_seconds'] or 0:.2f}s"
+                  + (f" - {summary['error']}" if summary['error'] else ""))
+
+    summary_df = pd.DataFrame(summaries, columns=SUMMARY_COLUMNS).sort_values('plant_id').reset_index(drop=True)
+    daily_df = pd.concat(daily_parts, ignore_index=True) if daily_parts else pd.DataFrame(columns=['plant_id', 'Day'])
+    grid_df = pd.concat(grid_parts, ignore_index=True).sort_values('plant_id', kind='stable').reset_index(drop=True) if grid_parts else None
+    return summary_df, daily_df, grid_df
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Loss analysis for many plants in parallel")
+    parser.add_argument('source', type=str, help="Directory of workbooks, or a .csv/.json manifest with a 'workbook' column and optional per-plant parameters")
+    parser.add_argument('--increment_value', type=float, default=PLANT_DEFAULTS['increment_value'], help="Default increment value in MWh")
+    parser.add_argument('--clipping_line', type=float, default=PLANT_DEFAULTS['clipping_line'], help="Default clipping line in MW")
+    parser.add_argument('--base_capacity', type=float, default=PLANT_DEFAULTS['base_capacity'], help="Default base capacity in MW")
+    parser.add_argument('--interval_hours', type=float, default=PLANT_DEFAULTS['interval_hours'], help="Default length of one reading in hours (default: inferred from the timestamps)")
+    parser.add_argument('--resample_minutes', type=int, default=PLANT_DEFAULTS['resample_minutes'], help="Default interval in minutes to aggregate finer readings to")
+    parser.add_argument('--grid_increments', type=str, default=None, help="Also total the losses for these increment values in MWh, e.g. '5,10,20'")
+    parser.add_argument('--grid_clipping_lines', type=str, default=None, help="Also total the losses for these clipping lines in MW, e.g. '100,110,120'")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: available cores)")
+    parser.add_argument('--output_folder', type=str, default=None, help="Folder for the results (default: 'assets/batch')")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default=None, help="Storage format for the results")
+    parser.add_argument('--export_csv', action='store_true', help="Also export the results as CSV")
+
+    args = parser.parse_args()
+
+    plants = load_plants(args.source, {
+        'increment_value': args.increment_value,
+        'clipping_line': args.clipping_line,
+        'base_capacity': args.base_capacity,
+        'interval_hours': args.interval_hours,
+        'resample_minutes': args.resample_minutes,
+        'grid_increments': args.grid_increments,
+        'grid_clipping_lines': args.grid_clipping_lines,
+    })
+    if not plants:
+        raise SystemExit(f"No plants found in '{args.source}'.")
+
+    started = time.perf_counter()
+    summary_df, daily_df, grid_df = run_batch(plants, args.workers)
+
+    output_folder = args.output_folder or os.path.join(get_assets_folder(), 'batch')
+    save_frame(summary_df, 'batch_summary', args.format, output_folder)
+    save_frame(daily_df, 'batch_daily_losses', args.format, output_folder)
+    if grid_df is not None:
+        save_frame(grid_df, 'batch_grid', args.format, output_folder)
+    if args.export_csv:
+        export_csv(summary_df, 'batch_summary', output_folder)
+        export_csv(daily_df, 'batch_daily_losses', output_folder)
+        if grid_df is not None:
+            export_csv(grid_df, 'batch_grid', output_folder)
+
+    failed = (summary_df['status'] != 'ok').sum()
+    print(summary_df[['plant_id', 'status', 'rows', 'Loss_Difference', 'total_seconds']].to_string(index=False))
+    print(f"\n{len(plants) - failed} of {len(plants)} plants done in {time.perf_counter() - started:.2f}s; results saved to '{output_folder}'.")
+    raise SystemExit(1 if failed else 0)
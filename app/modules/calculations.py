@@ -1,35 +1,42 @@
-import pandas as pd
-import os
 import argparse
 
+from storage import save_frame, load_frame, export_csv, frame_exists
+from workspace import get_workspace_folder
+from schema import day_numbers, to_day_number
+from plant import PlantParameters, DEFAULT_PLANT
+
 # Function to add incremented energy
-def add_incremented_energy(df, increment_value):
-    df['incremented_energy MWh'] = ((140 + increment_value) * df['Energy MWh']) / 140
+def add_incremented_energy(df, increment_value, plant=DEFAULT_PLANT):
+    df['incremented_energy MWh'] = df['Energy MWh'] * plant.scale_factor(increment_value)
     return df
 
+# Function to keep only the rows between start_date and end_date (inclusive)
+def filter_by_date_range(df, start_date, end_date):
+    days = day_numbers(df['Date'])
+    mask = (days >= to_day_number(start_date)) & (days <= to_day_number(end_date))
+    return df[mask]
+
 # Function to save calculated data
-def save_calculated_data(df, file_name='calculated_data.csv'):
-    column_order = ['Date', 'Time Interval', 'Power MW', 'Energy MWh', 'incremented_energy MWh']
+def save_calculated_data(df, name='calculated_data', fmt=None, csv_export=False, folder=None):
+    column_order = ['Date', 'Time Interval', 'Power MW', 'Energy MWh', 'incremented_energy MWh', 'interval_start', 'interval_minutes']
     df = df[column_order]
     
-    # Get the absolute path to the 'assets' folder (relative path)
-    assets_folder = os.path.abspath(os.path.join(os.getcwd(), '../../assets'))
-    
-    # Ensure the folder exists
-    if not os.path.exists(assets_folder):
-        os.makedirs(assets_folder)
-    
-    file_path = os.path.join(assets_folder, file_name)
-    
-    # Save the dataframe as a CSV file
-    df.to_csv(file_path, index=False)
+    # Save the dataframe to the intermediate store (and optionally as CSV)
+    file_path = save_frame(df, name, fmt, folder)
+    if csv_export:
+        export_csv(df, name, folder)
+    return file_path
 
 # Main entry point
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Energy loss calculation")
     parser.add_argument('--increment_value', type=int, required=True, help="Increment value in MWh")
+    parser.add_argument('--base_capacity', type=float, default=DEFAULT_PLANT.base_capacity, help="Base capacity of the plant in MW")
     parser.add_argument('--start_date', type=str, required=True, help="Start date in format dd-mm-yyyy")
     parser.add_argument('--end_date', type=str, required=True, help="End date in format dd-mm-yyyy")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default=None, help="Intermediate storage format")
+    parser.add_argument('--workspace', type=str, default=None, help="Keep the files in 'assets/workspaces/<name>' instead of the shared assets folder")
+    parser.add_argument('--export_csv', action='store_true', help="Also export the calculated data as CSV")
     
     args = parser.parse_args()
 
@@ -38,29 +45,25 @@ if __name__ == "__main__":
         start_date = args.start_date
         end_date = args.end_date
 
-        # Load the cleaned data from the correct path
-        assets_folder = os.path.abspath(os.path.join(os.getcwd(), '../../assets'))
-        file_path = os.path.join(assets_folder, 'cleaned_data.csv')
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError("CSV file 'cleaned_data.csv' not found in the assets folder. Run 'cleaning.py' first.")
+        # Load the cleaned data from the assets folder (or the workspace); 'Date' is already typed
+        folder = get_workspace_folder(args.workspace) if args.workspace else None
+        if not frame_exists('cleaned_data', args.format, folder):
+            raise FileNotFoundError("Cleaned data not found in the assets folder. Run 'cleaning.py' first.")
 
-        df = pd.read_csv(file_path)
+        df = load_frame('cleaned_data', args.format, folder)
         
         # Filter the data based on the date range (start_date and end_date)
-        df['Date'] = pd.to_datetime(df['Date'], format='%d-%m-%Y')
-        mask = (df['Date'] >= pd.to_datetime(start_date, format='%d-%m-%Y')) & (df['Date'] <= pd.to_datetime(end_date, format='%d-%m-%Y'))
-        filtered_df = df[mask]
+        filtered_df = filter_by_date_range(df, start_date, end_date).copy()
 
         # Perform calculation to add the incremented energy column
-        calculated_df = add_incremented_energy(filtered_df, increment_value)
+        calculated_df = add_incremented_energy(filtered_df, increment_value, PlantParameters(base_capacity=args.base_capacity))
         
         # Save the final dataframe
-        save_calculated_data(calculated_df)
+        calculated_file_path = save_calculated_data(calculated_df, fmt=args.format, csv_export=args.export_csv, folder=folder)
 
         print("Calculated DataFrame:")
         print(calculated_df.head())
-        print(f"\nCalculated data saved to '{os.path.join(assets_folder, 'calculated_data.csv')}'!")
+        print(f"\nCalculated data saved to '{calculated_file_path}'!")
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,52 @@
+import numpy as np
+
+# Rendering helpers for long-range charts. Interval-level series are reduced on
+# the server to the minimum and maximum of each bucket, so the peaks that reach
+# the clipping line are always drawn. Large traces switch to WebGL and tick
+# labels are thinned to a readable number. Plotly is imported on first use so
+# that importing this module stays cheap.
+
+MAX_CHART_POINTS = 2000
+WEBGL_MIN_POINTS = 1000
+MAX_TICKS = 100
+
+# Function to pick the positions of the min and max of every bucket (plus both ends)
+def min_max_indices(values, max_points=MAX_CHART_POINTS):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    bucket_size = -(-n // max(1, max_points // 2))
+    bucket_count = -(-n // bucket_size)
+    padded = np.full(bucket_count * bucket_size, np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(bucket_count, bucket_size)
+
+    offsets = np.arange(bucket_count) * bucket_size
+    highest = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    lowest = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    return np.unique(np.concatenate(([0, n - 1], highest, lowest)))
+
+# Function to reduce one (x, y) series to at most about max_points points
+def downsample(x, y, max_points=MAX_CHART_POINTS):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    keep = min_max_indices(y, max_points)
+    return x[keep], y[keep]
+
+# Function to keep about max_ticks evenly spaced labels; a Series stays a Series
+# so timestamps keep their type (np.asarray would turn them into nanoseconds)
+def thin_ticks(labels, max_ticks=MAX_TICKS):
+    step = max(1, -(-len(labels) // max_ticks))
+    if hasattr(labels, 'iloc'):
+        return labels.iloc[::step]
+    return np.asarray(labels)[::step]
+
+# Function to build a line trace, downsampled and drawn with WebGL when it is long
+def line_trace(x, y, max_points=MAX_CHART_POINTS, **kwargs):
+    import plotly.graph_objects as go
+
+    x, y = downsample(x, y, max_points)
+    trace_type = go.Scattergl if len(x) >= WEBGL_MIN_POINTS else go.Scatter
+    return trace_type(x=x, y=y, **kwargs)
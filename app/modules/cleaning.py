@@ -1,12 +1,91 @@
 import pandas as pd
+import numpy as np
 import os
+import argparse
+
+from storage import save_frame, export_csv, get_assets_folder
+from workspace import get_workspace_folder
+from plant import PlantParameters, DEFAULT_PLANT
+
+# The raw 'Time' column always has the fixed layout 'dd-mm-yyyy HH:MM-HH:MM'
+TIME_TEXT_WIDTH = 22
+TIME_SEPARATORS = {2: '-', 5: '-', 10: ' ', 13: ':', 16: '-', 19: ':'}
+TIME_DIGITS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18, 20, 21]
+
+def _two_digits(digits, position):
+    return digits[:, position] * 10 + digits[:, position + 1]
+
+def parse_time_column(time_values):
+    # Parse every 'dd-mm-yyyy HH:MM-HH:MM' value in one vectorized pass by reading
+    # the characters at fixed offsets. Values that do not match give NaT.
+    text = np.asarray(time_values, dtype=object).astype(str)
+    valid = np.char.str_len(text) == TIME_TEXT_WIDTH
+
+    # View each fixed-width value as a row of character codes
+    chars = text.astype(f'U{TIME_TEXT_WIDTH}').view(np.uint32).reshape(-1, TIME_TEXT_WIDTH)
+    for position, separator in TIME_SEPARATORS.items():
+        valid &= chars[:, position] == ord(separator)
+
+    digits = chars.astype(np.int64) - ord('0')
+    valid &= ((digits[:, TIME_DIGITS] >= 0) & (digits[:, TIME_DIGITS] <= 9)).all(axis=1)
+    digits[~valid] = 0
+
+    day = _two_digits(digits, 0)
+    month = _two_digits(digits, 3)
+    year = _two_digits(digits, 6) * 100 + _two_digits(digits, 8)
+    start_minutes = _two_digits(digits, 11) * 60 + _two_digits(digits, 14)
+    end_minutes = _two_digits(digits, 17) * 60 + _two_digits(digits, 20)
+
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (start_minutes < 24 * 60) & (end_minutes <= 24 * 60)
+    month = np.where(valid, month, 1)
+    day = np.where(valid, day, 1)
+
+    # Build the dates from months since 1970 plus the day offset, then reject
+    # days that roll over into the next month (e.g. 31-04)
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1)
+    valid &= dates.astype('datetime64[M]') == months
+
+    # An interval ending at '00:00' finishes on the next day
+    end_minutes = np.where(end_minutes <= start_minutes, end_minutes + 24 * 60, end_minutes)
+    interval_start = dates.astype('datetime64[m]') + start_minutes
+    interval_minutes = np.where(valid, end_minutes - start_minutes, 0)
+
+    not_a_time = np.datetime64('NaT')
+    dates = np.where(valid, dates, not_a_time).astype('datetime64[ns]')
+    interval_start = np.where(valid, interval_start, not_a_time).astype('datetime64[ns]')
+
+    # 'HH:MM-HH:MM' part of each value, kept for labelling the charts
+    interval_labels = np.ascontiguousarray(chars[:, 11:]).view(f'U{TIME_TEXT_WIDTH - 11}').ravel()
+    interval_labels = np.where(valid, interval_labels, None)
+
+    return dates, interval_labels, interval_start, interval_minutes
 
 def split_date_time(df):
-    # Splitting the 'Time' column into 'Date' and 'Time Interval'
-    df[['Date', 'Time Interval']] = df['Time'].str.split(' ', n=1, expand=True)
-    return df.drop(columns=['Time'])
+    # Splitting the 'Time' column into a typed 'Date', the 'Time Interval' label,
+    # the typed 'interval_start' timestamp and the reading length in minutes
+    dates, interval_labels, interval_start, interval_minutes = parse_time_column(df['Time'])
+    df = df.drop(columns=['Time'])
+    df['Date'] = dates
+    df['Time Interval'] = interval_labels
+    df['interval_start'] = interval_start
+    df['interval_minutes'] = interval_minutes
+    return df
+
+# Function to get the length of every reading in hours
+def reading_hours(df):
+    return df['interval_minutes'].to_numpy(dtype=np.float64) / 60
 
-def clean_dataframe(df):
+# Function to find the most common reading length in hours (0.25 for 15-minute data)
+def infer_interval_hours(df):
+    hours = reading_hours(df)
+    hours = hours[np.isfinite(hours)]
+    if len(hours) == 0:
+        return None
+    values, counts = np.unique(hours, return_counts=True)
+    return float(values[np.argmax(counts)])
+
+def clean_dataframe(df, plant=DEFAULT_PLANT):
     # Dropping rows with missing values
     df = df.dropna()
     
@@ -14,52 +93,88 @@ def clean_dataframe(df):
     if "Power MW" in df.columns:
         df = df[df["Power MW"] >= 0]
     
-    # Add the 'Energy MWh' column, calculating it based on 'Power MW'
-    df['Energy MWh'] = df['Power MW'] * 0.25  
+    # Add the 'Energy MWh' column from 'Power MW' and the length of each reading;
+    # an override becomes every row's reading length, so the clipping limits match
+    if plant.interval_hours is not None:
+        df['interval_minutes'] = round(plant.interval_hours * 60)
+    df['Energy MWh'] = df['Power MW'] * reading_hours(df)
     return df
 
-def save_cleaned_data(df, file_name='cleaned_data.csv'):
+# Function to get the resampling bucket of every reading (minutes since 1970 // bucket length)
+def bucket_numbers(df, minutes):
+    return df['interval_start'].to_numpy(dtype='datetime64[m]').astype(np.int64) // int(minutes)
+
+# Function to aggregate cleaned readings into fixed buckets of `minutes`. The
+# energy of a bucket is the sum of its readings and its power is the average
+# over the bucket. Data that is already as coarse is returned unchanged.
+def resample_intervals(df, minutes):
+    interval_hours = infer_interval_hours(df)
+    if interval_hours is None or interval_hours * 60 >= minutes:
+        return df
+
+    buckets, codes = np.unique(bucket_numbers(df, minutes), return_inverse=True)
+    energy = np.bincount(codes, weights=df['Energy MWh'].to_numpy(dtype=np.float64), minlength=len(buckets))
+
+    interval_start = pd.DatetimeIndex((buckets * int(minutes)).astype('datetime64[m]').astype('datetime64[ns]'))
+    interval_end = interval_start + pd.Timedelta(minutes=int(minutes))
+    return pd.DataFrame({
+        'Date': interval_start.normalize(),
+        'Time Interval': interval_start.strftime('%H:%M') + '-' + interval_end.strftime('%H:%M'),
+        'Power MW': energy / (minutes / 60),
+        'Energy MWh': energy,
+        'interval_start': interval_start,
+        'interval_minutes': np.full(len(buckets), int(minutes)),
+    })
+
+def save_cleaned_data(df, name='cleaned_data', fmt=None, csv_export=False, folder=None):
     # Reorder columns before saving the cleaned data
-    column_order = ['Date', 'Time Interval', 'Power MW', 'Energy MWh']
+    column_order = ['Date', 'Time Interval', 'Power MW', 'Energy MWh', 'interval_start', 'interval_minutes']
     df = df[column_order]
     
-    # Get the absolute path to the assets folder (relative path)
-    assets_folder = os.path.abspath(os.path.join(os.getcwd(), '../../assets'))
-    
-    # Ensure the folder exists
-    if not os.path.exists(assets_folder):
-        os.makedirs(assets_folder)
+    # Save the dataframe to the intermediate store (and optionally as CSV)
+    file_path = save_frame(df, name, fmt, folder)
+    if csv_export:
+        export_csv(df, name, folder)
+    return file_path
 
-    file_path = os.path.join(assets_folder, file_name)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the raw power data")
+    parser.add_argument('--interval_hours', type=float, default=None, help="Length of one reading in hours (default: inferred from the timestamps)")
+    parser.add_argument('--resample_minutes', type=int, default=None, help="Aggregate finer readings to this interval in minutes")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default=None, help="Intermediate storage format")
+    parser.add_argument('--workspace', type=str, default=None, help="Keep the files in 'assets/workspaces/<name>' instead of the shared assets folder")
+    parser.add_argument('--export_csv', action='store_true', help="Also export the cleaned data as CSV")
     
-    # Save the dataframe to a CSV file
-    df.to_csv(file_path, index=False)
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     try:
-        # Get the absolute path to the assets folder, relative path to 'assets'
-        assets_folder = os.path.abspath(os.path.join(os.getcwd(), '../../assets'))
+        # Get the absolute path to the assets folder (or to the workspace inside it)
+        assets_folder = get_workspace_folder(args.workspace) if args.workspace else get_assets_folder()
         
         # Check if the 'data.csv' file exists in the assets folder
         file_path = os.path.join(assets_folder, 'data.csv')
         if not os.path.exists(file_path):
-            raise FileNotFoundError("CSV file 'data.csv' not found in the assets folder. Run 'excel_to_df.py' first.")
+            raise FileNotFoundError(f"CSV file 'data.csv' not found in '{assets_folder}'. Run 'excel_to_df.py' first.")
         
         # Read the CSV file into a DataFrame
         df = pd.read_csv(file_path)
         
-        # Split the 'Time' column into 'Date' and 'Time Interval'
+        # Parse the 'Time' column into 'Date', 'Time Interval' and the interval timestamps
         df = split_date_time(df)
         
         # Clean the DataFrame by dropping NaNs and applying other filters
-        cleaned_df = clean_dataframe(df)
+        plant = PlantParameters(interval_hours=args.interval_hours, resample_minutes=args.resample_minutes)
+        cleaned_df = clean_dataframe(df, plant)
+        if plant.resample_minutes:
+            cleaned_df = resample_intervals(cleaned_df, plant.resample_minutes)
         
-        # Save the cleaned data to the 'assets/cleaned_data.csv' file
-        save_cleaned_data(cleaned_df)
+        # Save the cleaned data to the assets folder
+        cleaned_file_path = save_cleaned_data(cleaned_df, fmt=args.format, csv_export=args.export_csv, folder=assets_folder)
         
         print("Cleaned DataFrame:")
         print(cleaned_df.head())
-        print("\nCleaned data saved to 'assets/cleaned_data.csv'!")
+        print(f"\nReading length: {infer_interval_hours(cleaned_df) * 60:g} minutes")
+        print(f"Cleaned data saved to '{cleaned_file_path}'!")
     
     except Exception as e:
         print(f"An error occurred: {e}")
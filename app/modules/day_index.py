@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from analysis import daily_loss_kernel
+from schema import day_numbers, to_day_number
+from cleaning import reading_hours
+from plant import DEFAULT_PLANT
+
+# Per-day prefix sums over the cleaned data, built once at ingest. The data is
+# sorted by date and cut into days, and the cumulative daily energy is stored.
+# A date-range total is then two binary searches on the day array and one
+# subtraction, whatever the length of the history.
+#
+# The clipped loss is not linear in the increment, so its per-day prefix is
+# computed once per (increment, clipping line) pair on first use and cached.
+# Moving the date pickers afterwards only does lookups.
+
+MAX_CACHED_LOSS_PREFIXES = 16
+
+class DayIndex:
+    def __init__(self, cleaned_df, plant=DEFAULT_PLANT):
+        df = cleaned_df.sort_values('Date', kind='stable')
+        dates = day_numbers(df['Date'])
+
+        # Distinct day numbers and the offset of each day's first row in the sorted data
+        self.days, self.day_offsets = np.unique(dates, return_index=True)
+        self.day_codes = np.repeat(np.arange(len(self.days)), np.diff(np.append(self.day_offsets, len(dates))))
+        self.energy = df['Energy MWh'].to_numpy(dtype=np.float64)
+        self.hours = reading_hours(df)
+        self.plant = plant
+
+        daily_energy = np.add.reduceat(self.energy, self.day_offsets) if len(self.energy) else np.zeros(0)
+        self.energy_prefix = np.concatenate(([0.0], np.cumsum(daily_energy)))
+
+        self._loss_prefixes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.days)
+
+    # Function to find the [first, last) day positions covering start_date..end_date
+    def day_range(self, start_date, end_date):
+        first = np.searchsorted(self.days, to_day_number(start_date), side='left')
+        last = np.searchsorted(self.days, to_day_number(end_date), side='right')
+        return first, max(first, last)
+
+    def total_energy(self, start_date, end_date):
+        first, last = self.day_range(start_date, end_date)
+        return self.energy_prefix[last] - self.energy_prefix[first]
+
+    # Function to get (or build once) the cumulative daily losses for one parameter pair
+    def loss_prefixes(self, increment_value, clipping_line=None):
+        if clipping_line is None:
+            clipping_line = self.plant.clipping_line
+        key = (float(increment_value), float(clipping_line))
+
+        with self._lock:
+            if key in self._loss_prefixes:
+                self._loss_prefixes.move_to_end(key)
+                return self._loss_prefixes[key]
+
+        incremented = self.energy * self.plant.scale_factor(increment_value)
+        limits = clipping_line * self.hours
+        loss_without, loss_with = daily_loss_kernel(self.energy, incremented, self.day_codes, len(self.days), limits)
+        prefixes = (
+            np.concatenate(([0.0], np.cumsum(loss_without))),
+            np.concatenate(([0.0], np.cumsum(loss_with))),
+        )
+
+        with self._lock:
+            self._loss_prefixes[key] = prefixes
+            while len(self._loss_prefixes) > MAX_CACHED_LOSS_PREFIXES:
+                self._loss_prefixes.popitem(last=False)
+        return prefixes
+
+    # Function to return the total losses between two dates (both inclusive)
+    def total_losses(self, start_date, end_date, increment_value, clipping_line=None):
+        first, last = self.day_range(start_date, end_date)
+        without_prefix, with_prefix = self.loss_prefixes(increment_value, clipping_line)
+
+        loss_without = without_prefix[last] - without_prefix[first]
+        loss_with = with_prefix[last] - with_prefix[first]
+        return {
+            'Loss_Without_Clipping': loss_without,
+            'Loss_With_Clipping': loss_with,
+            'Loss_Difference': loss_without - loss_with,
+        }
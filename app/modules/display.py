@@ -1,9 +1,22 @@
+import time
+
 import streamlit as st
-import subprocess
 import pandas as pd
-import os
-import shutil
-import plotly.graph_objects as go
+import numpy as np
+
+from pipeline import run_calculations
+from sensitivity import sweep_increments
+from ingest_cache import load_cleaned_data_cached
+from day_index import DayIndex
+from workspace import get_workspace, close_idle_workspaces
+from schema import day_numbers, to_day_number, day_number_to_date
+from incremental import merge_cleaned_data, refresh_calculated_data, DailyLossCache
+from plant import DEFAULT_PLANT
+from cleaning import infer_interval_hours, reading_hours
+from charts import line_trace, thin_ticks
+from warmup import warm_up
+from jobs import submit_job
+from instrumentation import span, start_collecting, stop_collecting, configure_logging, set_memory_tracing, memory_tracing_enabled
 
 st.set_page_config(page_title="Loss Analyzer", layout="wide")
 
@@ -46,13 +59,130 @@ st.markdown("""
 def initialize_session_state():
     if "calculation_done" not in st.session_state:
         st.session_state.calculation_done = False
-    if "analyzed_data" not in st.session_state:
-        st.session_state.analyzed_data = None
-    if "calculated_data" not in st.session_state:
-        st.session_state.calculated_data = None
+    if "workspace_id" not in st.session_state:
+        st.session_state.workspace_id = get_workspace().workspace_id
+    if "upload_id" not in st.session_state:
+        st.session_state.upload_id = None
+    if "day_index" not in st.session_state:
+        st.session_state.day_index = None
+    if "appended_ids" not in st.session_state:
+        st.session_state.appended_ids = []
+    if "plant" not in st.session_state:
+        st.session_state.plant = DEFAULT_PLANT
+    if "results_details" not in st.session_state:
+        st.session_state.results_details = None
+    if "performance" not in st.session_state:
+        st.session_state.performance = {}
+    if "calculation_job" not in st.session_state:
+        st.session_state.calculation_job = None
 
 initialize_session_state()
 
+# Import the chart and file libraries in the background while the first page renders
+warm_up()
+
+# Stage timings of this script run, shown in the performance panel at the end
+configure_logging()
+start_collecting()
+with st.sidebar:
+    show_performance = st.checkbox("Show performance panel")
+    # Memory tracing slows every allocation and applies to the whole server process
+    trace_memory = st.checkbox("Track peak memory", value=memory_tracing_enabled(), disabled=not show_performance)
+    if trace_memory != memory_tracing_enabled():
+        set_memory_tracing(trace_memory)
+
+# The session's data frames live in its own workspace, never in shared files.
+# Workspaces of sessions idle for a few hours are released.
+WORKSPACE_IDLE_SECONDS = 4 * 60 * 60
+RESAMPLE_OPTIONS = [None, 5, 10, 15, 30, 60]
+TABLE_PAGE_ROWS = 50
+JOB_POLL_SECONDS = 0.5
+HIGHLIGHT_STYLE = 'background-color: red; color: white'
+MAX_CURVE_DAYS = 31
+workspace = get_workspace(st.session_state.workspace_id)
+close_idle_workspaces(WORKSPACE_IDLE_SECONDS)
+
+# Streamlit reruns this script on every widget change, so the cleaned data is
+# kept in the workspace and only rebuilt when a different file is uploaded
+def get_upload_id(uploaded_file):
+    return getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+
+def clear_results():
+    st.session_state.calculation_done = False
+    workspace.remove("analyzed_data")
+    workspace.remove("calculated_data")
+    cancel_calculation()
+
+def cancel_calculation():
+    job = st.session_state.calculation_job
+    if job is not None and not job.finished:
+        job.cancel()
+    st.session_state.calculation_job = None
+
+# Runs on the job thread; its spans are handed back for the performance panel
+def calculate_in_background(cleaned_data, increment_value, start_date, end_date, plant, progress):
+    start_collecting()
+    try:
+        results = run_calculations(cleaned_data, increment_value, start_date, end_date, plant, progress)
+    finally:
+        spans = stop_collecting()
+    return results, spans
+
+def build_day_index(cleaned_data, plant=DEFAULT_PLANT):
+    with span('build_day_index', rows=len(cleaned_data)):
+        return DayIndex(cleaned_data, plant)
+
+def get_cleaned_data(uploaded_file, ingest_plant):
+    upload_id = (get_upload_id(uploaded_file), ingest_plant.resample_minutes)
+    if st.session_state.upload_id != upload_id or "cleaned_data" not in workspace:
+        with st.spinner("Reading and cleaning the uploaded file..."):
+            cleaned_data = load_cleaned_data_cached(uploaded_file, plant=ingest_plant)
+            workspace.put("cleaned_data", cleaned_data)
+            st.session_state.day_index = build_day_index(cleaned_data)
+        st.session_state.upload_id = upload_id
+        st.session_state.appended_ids = []
+
+        # Results from a previous upload no longer apply
+        clear_results()
+    return workspace.get("cleaned_data")
+
+# Function to recompute the shown results for the appended days only; the
+# days outside the calculated date range do not change them
+def refresh_results(merged_data, changed_days):
+    details = st.session_state.results_details
+    first_day, last_day = to_day_number(details['start_date']), to_day_number(details['end_date'])
+    changed_days = np.asarray(changed_days, dtype=np.int64)
+    changed_days = changed_days[(changed_days >= first_day) & (changed_days <= last_day)]
+    if len(changed_days) == 0:
+        return
+
+    with span('refresh_results', rows=len(merged_data), days=len(changed_days)):
+        cache = DailyLossCache(details['increment_value'], details['plant'], workspace.get("analyzed_data"))
+        workspace.put("analyzed_data", cache.update(merged_data, changed_days))
+        workspace.put("calculated_data", refresh_calculated_data(
+            workspace.get("calculated_data"), merged_data, changed_days, details['increment_value'], details['plant']
+        ))
+
+# Merge a newer export into the session's cleaned data, once per appended file
+def append_cleaned_data(appended_file, ingest_plant):
+    upload_id = get_upload_id(appended_file)
+    if upload_id not in st.session_state.appended_ids:
+        with st.spinner("Merging the new export..."):
+            new_data = load_cleaned_data_cached(appended_file, plant=ingest_plant)
+            merged_data, changed_days = merge_cleaned_data(workspace.get("cleaned_data"), new_data)
+            workspace.put("cleaned_data", merged_data)
+            # The per-day prefix sums shift for every later day, so the index is
+            # rebuilt; it is one vectorized pass and its loss prefixes refill lazily
+            st.session_state.day_index = build_day_index(merged_data, st.session_state.day_index.plant)
+
+            # A running calculation used the old data; finished results are patched
+            if st.session_state.calculation_job is not None:
+                clear_results()
+            elif st.session_state.calculation_done and st.session_state.results_details and "analyzed_data" in workspace:
+                refresh_results(merged_data, changed_days)
+        st.session_state.appended_ids.append(upload_id)
+    return workspace.get("cleaned_data")
+
 st.title("Loss Analyzer")
 
 # Upload section
@@ -60,35 +190,42 @@ with st.container():
     st.subheader("Upload Data")
     uploaded_file = st.file_uploader("Upload an Excel file", type=["xls", "xlsx"])
 
+    # 1- and 5-minute exports can be summed into coarser intervals when they are read
+    resample_minutes = st.selectbox(
+        "Aggregate readings to", RESAMPLE_OPTIONS,
+        format_func=lambda minutes: "Exported interval" if minutes is None else f"{minutes} minutes"
+    )
+    ingest_plant = DEFAULT_PLANT.with_changes(resample_minutes=resample_minutes)
+
 if uploaded_file is not None:
     try:
-        assets_folder = os.path.abspath(os.path.join(os.getcwd(), '../../assets/'))
-        
-        if os.path.exists(assets_folder):
-            shutil.rmtree(assets_folder)
-        os.makedirs(assets_folder)
-
-        temp_excel_path = os.path.join(assets_folder, 'project_1_data.xlsx')
-        with open(temp_excel_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # Read and clean the workbook once per upload
+        cleaned_data = get_cleaned_data(uploaded_file, ingest_plant)
 
-        from excel_to_csv import convert_excel_to_csv
-        csv_file_name = 'data.csv'
+        # Newer daily/monthly exports can be appended to the uploaded history
+        appended_file = st.file_uploader("Append a newer export (optional)", type=["xls", "xlsx"], key="appended_file")
+        if appended_file is not None:
+            cleaned_data = append_cleaned_data(appended_file, ingest_plant)
 
-        convert_excel_to_csv(uploaded_file, csv_file_name)
-
-        subprocess.run(['python', 'cleaning.py'], check=True)
-        
+        # Plant parameters; the defaults are the original 140 MW plant
+        col1, col2 = st.columns(2)
+        with col1:
+            base_capacity = st.number_input("Base Capacity (in MW)", min_value=1.0, value=DEFAULT_PLANT.base_capacity, step=1.0)
+        with col2:
+            clipping_line = st.number_input("Clipping Line (in MW)", min_value=0.0, value=DEFAULT_PLANT.clipping_line, step=1.0)
+        plant = ingest_plant.with_changes(base_capacity=base_capacity, clipping_line=clipping_line)
 
-        # Load cleaned data
-        cleaned_data = pd.read_csv("../../assets/cleaned_data.csv")
+        # The index scales by the base capacity, so it is rebuilt when that changes
+        if st.session_state.day_index.plant.base_capacity != plant.base_capacity:
+            st.session_state.day_index = build_day_index(cleaned_data, plant)
 
-        # Convert date column
-        cleaned_data["Date"] = pd.to_datetime(cleaned_data["Date"], format="%d-%m-%Y")
+        interval_hours = infer_interval_hours(cleaned_data)
+        if interval_hours is not None:
+            st.caption(f"{len(cleaned_data)} readings of {interval_hours * 60:g} minutes each")
 
         # Set default start and end dates
-        min_date = cleaned_data["Date"].min().date()
-        max_date = cleaned_data["Date"].max().date()
+        min_date = day_number_to_date(day_numbers(cleaned_data["Date"]).min())
+        max_date = day_number_to_date(day_numbers(cleaned_data["Date"]).max())
 
         # Input values in a row
         col1, col2, col3 = st.columns(3)
@@ -99,39 +236,64 @@ if uploaded_file is not None:
             start_date = st.date_input("Select Start Date", value=min_date, min_value=min_date, max_value=max_date)
         with col3:
             end_date = st.date_input("Select End Date", value=max_date, min_value=min_date, max_value=max_date)
-            
+
+        # Quick preview of the totals for the selected range from the per-day index
+        range_losses = st.session_state.day_index.total_losses(start_date, end_date, increment_value, plant.clipping_line)
+        st.caption(
+            f"Selected range: total loss {range_losses['Loss_Difference']:.2f} MWh "
+            f"(without clipping {range_losses['Loss_Without_Clipping']:.2f} MWh, "
+            f"with clipping {range_losses['Loss_With_Clipping']:.2f} MWh)"
+        )
 
         # Center the button
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button('Calculate Loss', use_container_width=True):
-            try:
-                subprocess.run(['python', 'calculations.py', 
-                                '--increment_value', str(increment_value),
-                                '--start_date', start_date.strftime("%d-%m-%Y"),
-                                '--end_date', end_date.strftime("%d-%m-%Y")], check=True)
-
-                subprocess.run(['python', 'analysis.py'], check=True)
-
-                results_file_path = os.path.join(assets_folder, 'analysed_data.csv')
-                st.session_state.analyzed_data = pd.read_csv(results_file_path)
-
-                calculated_data_path = os.path.join(assets_folder, 'calculated_data.csv')
-                st.session_state.calculated_data = pd.read_csv(calculated_data_path)
-
-                st.session_state.calculation_done = True
-
-            except Exception as e:
-                st.error(f"An error occurred during the calculations or analysis: {e}")
+            # The analysis runs in the background; reruns only check on it
+            clear_results()
+            st.session_state.calculation_job = submit_job(
+                calculate_in_background, cleaned_data, increment_value, start_date, end_date, plant,
+                details={'plant': plant, 'increment_value': increment_value, 'start_date': start_date, 'end_date': end_date}
+            )
 
     except Exception as e:
         st.error(f"An error occurred while processing the Excel file: {e}")
 
-if st.session_state.calculation_done:
-    analyzed_data = st.session_state.analyzed_data
-    calculated_data = st.session_state.calculated_data
-
-    # Format 'Day' column
-    analyzed_data['Day'] = pd.to_datetime(analyzed_data['Day']).dt.strftime('%Y-%m-%d')
+# Show the progress of a running calculation, or pick up its result
+job = st.session_state.calculation_job
+if job is not None:
+    if not job.finished:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.progress(job.progress, text=job.stage)
+        with col2:
+            if st.button("Cancel", use_container_width=True):
+                cancel_calculation()
+                st.info("The calculation was cancelled.")
+    else:
+        st.session_state.calculation_job = None
+        if job.state == 'done':
+            (calculated_data, analyzed_data), job_spans = job.result
+            workspace.put("analyzed_data", analyzed_data)
+            workspace.put("calculated_data", calculated_data)
+            st.session_state.plant = job.details['plant']
+            st.session_state.results_details = job.details
+            st.session_state.performance.update({record['stage']: record for record in job_spans})
+
+            st.session_state.calculation_done = True
+        elif job.state == 'failed':
+            st.error(f"An error occurred during the calculations or analysis: {job.error}")
+
+if st.session_state.calculation_done and "analyzed_data" in workspace:
+    # Plotly is only imported once there are results to chart (usually already warm)
+    import plotly.graph_objects as go
+
+    analyzed_data = workspace.get("analyzed_data").copy()
+    calculated_data = workspace.get("calculated_data")
+    plant = st.session_state.plant  # parameters the shown results were calculated with
+
+    # Format 'Day' column; the stored 'Day' stays typed so it is never re-parsed
+    day_dates = analyzed_data['Day']
+    analyzed_data['Day'] = day_dates.dt.strftime('%Y-%m-%d')
 
     # Calculate total losses
     total_loss_without_clipping = analyzed_data['Loss_Without_Clipping'].sum()
@@ -151,12 +313,12 @@ if st.session_state.calculation_done:
 
 
     # Add month selection
-    analyzed_data['Month'] = pd.to_datetime(analyzed_data['Day']).dt.strftime('%B %Y')
+    analyzed_data['Month'] = day_dates.dt.strftime('%B %Y')
     unique_months = analyzed_data['Month'].unique()
 
     col1, col2 = st.columns([2, 1])
     with col1:
-        display_option = st.radio("Display Option:", ("Table", "Bar Graph", "Explicit Bar Graph"), horizontal=True)
+        display_option = st.radio("Display Option:", ("Table", "Bar Graph", "Explicit Bar Graph", "Sensitivity Curve"), horizontal=True)
     with col2:
         if len(unique_months) > 1:
             selected_month = st.selectbox("Select a Month:", unique_months)
@@ -164,14 +326,28 @@ if st.session_state.calculation_done:
 
     # Show Data Table or Graph
     if display_option == "Table":
-        # Highlight whole row where 'Loss_With_Clipping' is non-zero
-        def highlight_row(row):
-            return ['background-color: red; color: white' if row['Loss_Difference'] != 0 else '' for _ in row]
-
-        st.dataframe(
-            analyzed_data.drop(columns=['Month']).style.apply(highlight_row, axis=1),
-            use_container_width=True
+        table_data = analyzed_data.drop(columns=['Month'])
+
+        # Only one page of rows is styled and sent to the browser
+        page_count = max(1, -(-len(table_data) // TABLE_PAGE_ROWS))
+        page = 1
+        if page_count > 1:
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        page_data = table_data.iloc[(page - 1) * TABLE_PAGE_ROWS:page * TABLE_PAGE_ROWS]
+
+        # Highlight whole row where 'Loss_Difference' is non-zero, from one boolean mask
+        highlighted = page_data['Loss_Difference'].to_numpy() != 0
+        row_styles = np.where(highlighted, HIGHLIGHT_STYLE, '')
+        styles = pd.DataFrame(
+            np.repeat(row_styles[:, None], len(page_data.columns), axis=1),
+            index=page_data.index, columns=page_data.columns
         )
+
+        with span('render_table', rows=len(page_data)):
+            st.dataframe(
+                page_data.style.apply(lambda _: styles, axis=None),
+                use_container_width=True
+            )
     elif display_option == "Bar Graph":
         analyzed_data['Loss_Difference'] = analyzed_data['Loss_Without_Clipping'] - analyzed_data['Loss_With_Clipping']
         
@@ -203,12 +379,13 @@ if st.session_state.calculation_done:
             xaxis=dict(
                 tickangle=-45,  # Negative angle for opposite slant
                 tickmode='array', 
-                tickvals=analyzed_data['Day'], 
-                ticktext=analyzed_data['Day']
+                tickvals=thin_ticks(analyzed_data['Day']), 
+                ticktext=thin_ticks(analyzed_data['Day'])
             ),
             template='plotly_white'
         )
-        st.plotly_chart(fig, use_container_width=True)
+        with span('render_bar_graph', rows=len(analyzed_data)):
+            st.plotly_chart(fig, use_container_width=True)
 
     elif display_option == "Explicit Bar Graph":
         # Filter data where Loss_With_Clipping is non-zero
@@ -246,22 +423,85 @@ if st.session_state.calculation_done:
                 xaxis=dict(
                     tickangle=-45,  # Negative angle for opposite slant
                     tickmode='array', 
-                    tickvals=filtered_data['Day'], 
-                    ticktext=filtered_data['Day']
+                    tickvals=thin_ticks(filtered_data['Day']), 
+                    ticktext=thin_ticks(filtered_data['Day'])
                 ),
                 template='plotly_white'
             )
-            st.plotly_chart(fig_explicit, use_container_width=True)
+            with span('render_explicit_bar_graph', rows=len(filtered_data)):
+                st.plotly_chart(fig_explicit, use_container_width=True)
         else:
             st.warning("No data available for the selected criteria (Loss_With_Clipping > 0).")
 
-    # Select a specific day for detailed energy curve
-    selected_day = st.selectbox("Select a Day for Energy Curve", analyzed_data['Day'])
-    selected_day_calculated_data = calculated_data[calculated_data['Date'] == selected_day]
+    elif display_option == "Sensitivity Curve":
+        # Total losses over the selected date range for a whole range of increments
+        col1, col2 = st.columns(2)
+        with col1:
+            max_increment = st.number_input("Maximum Increment Value (in MWh)", min_value=1, value=50, step=1)
+        with col2:
+            increment_step = st.number_input("Increment Step (in MWh)", min_value=1, value=1, step=1)
+
+        increment_values = np.arange(increment_step, max_increment + increment_step, increment_step)
+        with span('sweep_increments', rows=len(calculated_data), increments=len(increment_values)):
+            _, sweep_totals = sweep_increments(calculated_data, increment_values, plant)
+
+        fig_sensitivity = go.Figure()
+        fig_sensitivity.add_trace(go.Scatter(
+            x=sweep_totals['increment_value'],
+            y=sweep_totals['Loss_Difference'],
+            mode='lines+markers',
+            name='Total Loss',
+            line=dict(color='goldenrod', width=3)
+        ))
+        fig_sensitivity.add_trace(go.Scatter(
+            x=sweep_totals['increment_value'],
+            y=sweep_totals['Loss_Without_Clipping'],
+            mode='lines+markers',
+            name='Loss Without Clipping',
+            line=dict(color='cornflowerblue', width=3)
+        ))
+        fig_sensitivity.add_trace(go.Scatter(
+            x=sweep_totals['increment_value'],
+            y=sweep_totals['Loss_With_Clipping'],
+            mode='lines+markers',
+            name='Loss With Clipping',
+            line=dict(color='lightcoral', width=3)
+        ))
+
+        fig_sensitivity.update_layout(
+            title='Energy Loss Sensitivity to the Increment Value (Selected Date Range)',
+            xaxis_title='Increment Value (MWh)',
+            yaxis_title='Energy Loss (MWh)',
+            template='plotly_white'
+        )
+        with span('render_sensitivity_curve', rows=len(sweep_totals)):
+            st.plotly_chart(fig_sensitivity, use_container_width=True)
 
-    # Compute clipped energy curve
-    clipping_threshold = 27.5
-    selected_day_calculated_data['clipped_energy MWh'] = selected_day_calculated_data['incremented_energy MWh'].apply(lambda x: min(x, clipping_threshold))
+    # Select a specific day (and optionally the days after it) for the detailed energy curve
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        selected_day = st.selectbox("Select a Day for Energy Curve", analyzed_data['Day'])
+    with col2:
+        curve_days = st.number_input("Number of Days", min_value=1, max_value=MAX_CURVE_DAYS, value=1, step=1)
+    first_day = to_day_number(selected_day)
+    curve_day_numbers = day_numbers(calculated_data['Date'])
+    selected_day_calculated_data = calculated_data[(curve_day_numbers >= first_day) & (curve_day_numbers < first_day + curve_days)].copy()
+
+    # A single day is labelled by its intervals; several days need the full timestamps
+    if curve_days == 1:
+        curve_x = selected_day_calculated_data['Time Interval'].astype(str)
+    else:
+        curve_x = selected_day_calculated_data['interval_start']
+
+    # Markers only while the curve is short enough to read them
+    curve_mode = 'lines+markers' if curve_days == 1 else 'lines'
+
+    # Compute clipped energy curve; the clipping line is in MW, so each reading's
+    # threshold in MWh follows its length
+    selected_day_calculated_data['threshold MWh'] = plant.clipping_line * reading_hours(selected_day_calculated_data)
+    selected_day_calculated_data['clipped_energy MWh'] = np.minimum(
+        selected_day_calculated_data['incremented_energy MWh'], selected_day_calculated_data['threshold MWh']
+    )
 
     # Radio button for curve selection
     curve_option = st.radio("Select Curve to Display", ["All Curves", "Energy MWh", "Incremented Energy MWh", "Clipped Energy MWh"], index=0)
@@ -269,64 +509,84 @@ if st.session_state.calculation_done:
     fig_curve = go.Figure()
     
     if curve_option in ["All Curves", "Energy MWh"]:
-        fig_curve.add_trace(go.Scatter(
-            x=selected_day_calculated_data['Time Interval'],
-            y=selected_day_calculated_data['Energy MWh'],
-            mode='lines+markers',
+        fig_curve.add_trace(line_trace(
+            curve_x,
+            selected_day_calculated_data['Energy MWh'],
+            mode=curve_mode,
             name='Energy MWh',
             line=dict(color='blue', width=3),  # Increased thickness
             marker=dict(size=10)
         ))
     
     if curve_option in ["All Curves", "Incremented Energy MWh"]:
-        fig_curve.add_trace(go.Scatter(
-            x=selected_day_calculated_data['Time Interval'],
-            y=selected_day_calculated_data['incremented_energy MWh'],
-            mode='lines+markers',
+        fig_curve.add_trace(line_trace(
+            curve_x,
+            selected_day_calculated_data['incremented_energy MWh'],
+            mode=curve_mode,
             name='Incremented Energy MWh',
             line=dict(color='green', width=3),  # Increased thickness
             marker=dict(size=10)
         ))
     
     if curve_option in ["All Curves", "Clipped Energy MWh"]:
-        fig_curve.add_trace(go.Scatter(
-            x=selected_day_calculated_data['Time Interval'],
-            y=selected_day_calculated_data['clipped_energy MWh'],
-            mode='lines+markers',
+        fig_curve.add_trace(line_trace(
+            curve_x,
+            selected_day_calculated_data['clipped_energy MWh'],
+            mode=curve_mode,
             name='Clipped Energy MWh',
             line=dict(color='orange', width=3),  # New clipped curve
             marker=dict(size=10)
         ))
     
-    fig_curve.add_trace(go.Scatter(
-        x=selected_day_calculated_data['Time Interval'],
-        y=[clipping_threshold] * len(selected_day_calculated_data),  # Red dashed line at threshold
+    fig_curve.add_trace(line_trace(
+        curve_x,
+        selected_day_calculated_data['threshold MWh'],  # Red dashed line at threshold
         mode='lines',
-        name='Threshold (27.5 MWh)',
+        name=f'Threshold ({plant.clipping_line:g} MW)',
         line=dict(color='red', dash='dash', width=2)
     ))
 
-    # Adding vertical lines for each x-axis point
-    for x_value in selected_day_calculated_data['Time Interval']:
-        fig_curve.add_shape(
-            type="line",
-            x0=x_value,
-            y0=0,
-            x1=x_value,
-            y1=max(selected_day_calculated_data['Energy MWh'].max(), selected_day_calculated_data['incremented_energy MWh'].max(), selected_day_calculated_data['clipped_energy MWh'].max()),
-            line=dict(color="gray", width=1, dash="dot")
-        )
+    # Vertical line at every labelled x-axis point, drawn as one trace with None gaps between the segments
+    curve_y_max = selected_day_calculated_data[['Energy MWh', 'incremented_energy MWh', 'clipped_energy MWh']].to_numpy().max(initial=0)
+    curve_ticks = thin_ticks(curve_x)
+    guide_x = np.repeat(np.asarray(curve_ticks, dtype=object), 3)
+    guide_x[2::3] = None
+    guide_y = np.tile(np.array([0, curve_y_max, None], dtype=object), len(curve_ticks))
+    fig_curve.add_trace(go.Scatter(
+        x=guide_x,
+        y=guide_y,
+        mode='lines',
+        line=dict(color="gray", width=1, dash="dot"),
+        hoverinfo='skip',
+        showlegend=False
+    ))
 
     fig_curve.update_layout(
-        title=f"Energy Curve for {selected_day}",
+        title=f"Energy Curve for {selected_day}" + (f" and the following {curve_days - 1} day(s)" if curve_days > 1 else ""),
         xaxis_title='Time Interval',
         yaxis_title='Energy MWh',
         xaxis=dict(
             tickangle=-45,  # Negative angle for opposite slant in curve plot
-            tickmode='array',
-            tickvals=selected_day_calculated_data['Time Interval'],
-            ticktext=selected_day_calculated_data['Time Interval']
+            tickmode='array' if curve_days == 1 else 'auto',
+            tickvals=curve_ticks if curve_days == 1 else None,
+            ticktext=curve_ticks if curve_days == 1 else None
         ),
         template='plotly_white'
     )
-    st.plotly_chart(fig_curve, use_container_width=True)
+    with span('render_energy_curve', rows=len(selected_day_calculated_data)):
+        st.plotly_chart(fig_curve, use_container_width=True)
+
+# Performance panel: the latest run of every stage seen in this session
+for record in stop_collecting():
+    st.session_state.performance[record['stage']] = record
+
+if show_performance and st.session_state.performance:
+    with st.expander("Performance"):
+        performance = pd.DataFrame(list(st.session_state.performance.values()))
+        columns = [col for col in ['stage', 'seconds', 'rows', 'peak_mb', 'source', 'error'] if col in performance.columns]
+        st.dataframe(performance[columns], use_container_width=True)
+
+# Check on a running calculation again shortly
+if st.session_state.calculation_job is not None:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
@@ -1,16 +1,76 @@
 import pandas as pd
 import os
 
-def convert_excel_to_csv(excel_file, csv_file_name):
-    assets_folder = os.path.join(os.getcwd(), '../../assets')
-    if not os.path.exists(assets_folder):
-        os.makedirs(assets_folder)
-    
+def read_excel_data(excel_file):
     # Read the uploaded Excel file directly from the Streamlit file buffer
     df = pd.read_excel(excel_file)
     
     if len(df.columns) > 1:
         df.rename(columns={df.columns[1]: "Power MW"}, inplace=True)
+    return df
+
+# Rows read from the workbook per chunk when streaming
+EXCEL_CHUNK_ROWS = 50_000
+
+def _is_xlsx(excel_file):
+    # .xlsx workbooks are zip archives; old .xls files are not and cannot be streamed
+    if isinstance(excel_file, (str, os.PathLike)):
+        with open(excel_file, 'rb') as f:
+            return f.read(4) == b'PK\x03\x04'
+
+    position = excel_file.tell()
+    signature = excel_file.read(4)
+    excel_file.seek(position)
+    return signature == b'PK\x03\x04'
+
+def _chunk_frame(rows, header):
+    df = pd.DataFrame(rows, columns=header)
+    if len(df.columns) > 1:
+        df.rename(columns={df.columns[1]: "Power MW"}, inplace=True)
+        df["Power MW"] = pd.to_numeric(df["Power MW"], errors='coerce')
+    return df
+
+def iter_excel_chunks(excel_file, chunk_rows=EXCEL_CHUNK_ROWS):
+    # Yield the first sheet as DataFrames of at most chunk_rows rows, reading
+    # .xlsx files row by row so only one chunk is held in memory at a time
+    if not _is_xlsx(excel_file):
+        df = read_excel_data(excel_file)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        # The header follows the sheet's dimension and may end in empty cells;
+        # pd.read_excel drops those all-empty columns, so they are cut here too
+        width = len(header)
+        while width > 0 and header[width - 1] is None:
+            width -= 1
+        header = header[:width]
+        chunk = []
+        for row in rows:
+            chunk.append(row[:width] + (None,) * (width - len(row)))
+            if len(chunk) >= chunk_rows:
+                yield _chunk_frame(chunk, header)
+                chunk = []
+        if chunk:
+            yield _chunk_frame(chunk, header)
+    finally:
+        workbook.close()
+
+def convert_excel_to_csv(excel_file, csv_file_name):
+    assets_folder = os.path.join(os.getcwd(), '../../assets')
+    if not os.path.exists(assets_folder):
+        os.makedirs(assets_folder)
+    
+    df = read_excel_data(excel_file)
     
     csv_file_path = os.path.join(assets_folder, csv_file_name)
     df.to_csv(csv_file_path, index=False)
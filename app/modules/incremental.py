@@ -0,0 +1,145 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from calculations import add_incremented_energy
+from analysis import calculate_daily_losses
+from pipeline import ingest_excel_to_store
+from schema import compact_dtypes, day_numbers
+from storage import save_frame, load_frame, frame_exists, get_frame_path
+from workspace import get_workspace_folder
+from plant import PlantParameters, DEFAULT_PLANT
+
+# Append mode for the daily SCADA exports. A new export is merged into the
+# cleaned data already held, and the daily losses are recomputed only for the
+# days the export touched. The cached aggregates of every other day are kept.
+
+DAILY_LOSS_COLUMNS = ['Day', 'Loss_Without_Clipping', 'Loss_With_Clipping', 'Loss_Difference']
+
+# Function to merge newly cleaned rows into the existing cleaned data
+def merge_cleaned_data(existing_df, new_df):
+    # A reading in the new export replaces the stored one for the same interval
+    new_df = compact_dtypes(new_df)
+    if existing_df is None or existing_df.empty:
+        merged = new_df
+    else:
+        merged = pd.concat([compact_dtypes(existing_df), new_df], ignore_index=True)
+        merged = merged.drop_duplicates(subset='interval_start', keep='last')
+
+    merged = merged.sort_values('interval_start', kind='stable').reset_index(drop=True)
+    changed_days = np.unique(day_numbers(new_df['Date']))
+    return compact_dtypes(merged), changed_days
+
+class DailyLossCache:
+    # Daily losses for the whole history at one increment value and plant
+    def __init__(self, increment_value, plant=DEFAULT_PLANT, daily_losses=None):
+        self.increment_value = increment_value
+        self.plant = plant
+        if daily_losses is None:
+            daily_losses = pd.DataFrame({
+                'Day': pd.Series(dtype='datetime64[ns]'),
+                'Loss_Without_Clipping': pd.Series(dtype=np.float64),
+                'Loss_With_Clipping': pd.Series(dtype=np.float64),
+                'Loss_Difference': pd.Series(dtype=np.float64),
+            })
+        self.daily_losses = daily_losses[DAILY_LOSS_COLUMNS].reset_index(drop=True)
+
+    # Function to recompute the given days (all days when None) from the cleaned data
+    def update(self, cleaned_df, changed_days=None):
+        if changed_days is None:
+            rows = cleaned_df
+            kept = self.daily_losses.iloc[0:0]
+        else:
+            changed_days = np.asarray(changed_days, dtype=np.int64)
+            rows = cleaned_df[np.isin(day_numbers(cleaned_df['Date']), changed_days)]
+            kept = self.daily_losses[~np.isin(day_numbers(self.daily_losses['Day']), changed_days)]
+
+        calculated = add_incremented_energy(rows.copy(), self.increment_value, self.plant)
+        recomputed = calculate_daily_losses(calculated, self.plant.clipping_line)
+        if recomputed is None:
+            raise ValueError("Daily losses could not be calculated for the changed days.")
+
+        parts = [part for part in (kept, recomputed) if not part.empty]
+        if parts:
+            self.daily_losses = pd.concat(parts, ignore_index=True).sort_values('Day', kind='stable').reset_index(drop=True)
+        return self.daily_losses
+
+    # Function to save the cache as a frame, with its parameters as columns
+    def to_frame(self):
+        df = self.daily_losses.copy()
+        df['increment_value'] = float(self.increment_value)
+        df['clipping_line'] = float(self.plant.clipping_line)
+        df['base_capacity'] = float(self.plant.base_capacity)
+        return df
+
+    # Function to rebuild the cache from to_frame() output if it was built with the same parameters
+    @classmethod
+    def from_frame(cls, df, increment_value, plant=DEFAULT_PLANT):
+        same_parameters = (
+            df is not None and not df.empty and 'base_capacity' in df.columns
+            and (df['increment_value'] == float(increment_value)).all()
+            and (df['clipping_line'] == float(plant.clipping_line)).all()
+            and (df['base_capacity'] == float(plant.base_capacity)).all()
+        )
+        return cls(increment_value, plant, df if same_parameters else None), same_parameters
+
+# Function to replace the rows of the changed days in an existing calculated frame
+def refresh_calculated_data(calculated_df, cleaned_df, changed_days, increment_value, plant=DEFAULT_PLANT):
+    changed_days = np.asarray(changed_days, dtype=np.int64)
+    kept = calculated_df[~np.isin(day_numbers(calculated_df['Date']), changed_days)]
+    rows = cleaned_df[np.isin(day_numbers(cleaned_df['Date']), changed_days)]
+    recalculated = add_incremented_energy(rows.copy(), increment_value, plant)[list(calculated_df.columns)]
+
+    merged = pd.concat([compact_dtypes(kept), compact_dtypes(recalculated)], ignore_index=True)
+    return compact_dtypes(merged.sort_values('interval_start', kind='stable').reset_index(drop=True))
+
+# Function to stream a new export into the store and merge it into 'cleaned_data'
+def append_excel_to_store(excel_file, fmt=None, folder=None, plant=DEFAULT_PLANT):
+    new_file_path = ingest_excel_to_store(excel_file, 'new_data', fmt, folder, plant=plant)
+    try:
+        new_df = load_frame('new_data', fmt, folder)
+    finally:
+        os.remove(new_file_path)
+
+    existing_df = load_frame('cleaned_data', fmt, folder) if frame_exists('cleaned_data', fmt, folder) else None
+    merged, changed_days = merge_cleaned_data(existing_df, new_df)
+    save_frame(merged, 'cleaned_data', fmt, folder)
+    return merged, changed_days
+
+# Function to bring the stored 'daily_losses' up to date for the changed days
+def refresh_daily_losses(cleaned_df, changed_days, increment_value, plant=DEFAULT_PLANT, fmt=None, folder=None):
+    stored = load_frame('daily_losses', fmt, folder) if frame_exists('daily_losses', fmt, folder) else None
+    cache, reusable = DailyLossCache.from_frame(stored, increment_value, plant)
+
+    # Recompute everything if the stored losses were built with other parameters
+    cache.update(cleaned_df, changed_days if reusable else None)
+    save_frame(cache.to_frame(), 'daily_losses', fmt, folder)
+    return cache.daily_losses
+
+# Main entry point: append a new export and refresh the daily losses
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append a new SCADA export to the cleaned data store")
+    parser.add_argument('excel_file', type=str, help="Path to the new .xlsx/.xls export")
+    parser.add_argument('--increment_value', type=float, default=None, help="Also refresh the stored daily losses for this increment value in MWh")
+    parser.add_argument('--clipping_line', type=float, default=DEFAULT_PLANT.clipping_line, help="Clipping line in MW")
+    parser.add_argument('--base_capacity', type=float, default=DEFAULT_PLANT.base_capacity, help="Base capacity of the plant in MW")
+    parser.add_argument('--interval_hours', type=float, default=None, help="Length of one reading in hours (default: inferred from the timestamps)")
+    parser.add_argument('--resample_minutes', type=int, default=None, help="Aggregate finer readings to this interval in minutes")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default=None, help="Intermediate storage format")
+    parser.add_argument('--workspace', type=str, default=None, help="Keep the files in 'assets/workspaces/<name>' instead of the shared assets folder")
+    
+    args = parser.parse_args()
+
+    try:
+        folder = get_workspace_folder(args.workspace) if args.workspace else None
+        plant = PlantParameters(args.base_capacity, args.clipping_line, args.interval_hours, args.resample_minutes)
+        merged, changed_days = append_excel_to_store(args.excel_file, args.format, folder, plant)
+        print(f"Merged {len(changed_days)} day(s) into '{get_frame_path('cleaned_data', args.format, folder)}' ({len(merged)} rows).")
+
+        if args.increment_value is not None:
+            daily_losses = refresh_daily_losses(merged, changed_days, args.increment_value, plant, args.format, folder)
+            print(f"Daily losses recomputed for {len(changed_days)} day(s) and saved to '{get_frame_path('daily_losses', args.format, folder)}'.")
+    except Exception as e:
+        print(f"An error occurred: {e}")
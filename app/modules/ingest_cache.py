@@ -0,0 +1,198 @@
+import hashlib
+import io
+import os
+import threading
+import argparse
+from collections import OrderedDict
+
+from pipeline import load_cleaned_data, ingest_excel_to_store, CLEANED_COLUMNS
+from storage import load_frame, frame_exists, get_frame_path
+from schema import compact_dtypes
+from plant import DEFAULT_PLANT
+from instrumentation import span
+
+# Cleaned data is keyed by a SHA-256 of the uploaded workbook bytes, so the same
+# workbook is only read and cleaned once. Recent uploads are kept in memory and
+# every cleaned upload is also written to the intermediate store under
+# 'assets/cache' to survive restarts. Workbooks given as paths (the service's
+# manifest plants) are only hashed again when their size or modification time
+# changes.
+#
+# CACHE_VERSION is part of every key. Bump it whenever ingest or cleaning
+# changes what they produce, so files written by older code are not reused.
+# The cache folder is kept under MAX_CACHE_BYTES by removing the least
+# recently used files (a hit refreshes a file's modification time).
+
+CACHE_VERSION = 3
+MAX_CACHED_UPLOADS = 8
+MAX_CACHE_BYTES = int(os.environ.get('LOSS_ANALYZER_CACHE_MB', '2048')) * 2**20
+
+_memory_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Workbook paths hashed before: absolute path -> ((size, mtime_ns), SHA-256)
+_path_digests = {}
+
+def get_cache_folder():
+    return os.path.abspath(os.path.join(os.getcwd(), '../../assets/cache'))
+
+# Function to get the raw bytes of a Streamlit upload, a file path or a file object
+def read_upload_bytes(excel_file):
+    if hasattr(excel_file, 'getvalue'):
+        return excel_file.getvalue()
+    if isinstance(excel_file, (str, os.PathLike)):
+        with open(excel_file, 'rb') as f:
+            return f.read()
+
+    data = excel_file.read()
+    excel_file.seek(0)
+    return data
+
+def hash_upload(data):
+    return hashlib.sha256(data).hexdigest()
+
+# Function to hash a workbook; returns (digest, bytes). A file path whose size and
+# modification time have not changed reuses its earlier digest without being
+# read again (the bytes are then None), so a warm request does not grow with
+# the workbook.
+def _hash_upload_source(excel_file):
+    if not isinstance(excel_file, (str, os.PathLike)):
+        data = read_upload_bytes(excel_file)
+        return hash_upload(data), data
+
+    path = os.path.abspath(excel_file)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        known = _path_digests.get(path)
+    if known is not None and known[0] == signature:
+        return known[1], None
+
+    data = read_upload_bytes(path)
+    digest = hash_upload(data)
+    with _cache_lock:
+        _path_digests[path] = (signature, digest)
+    return digest, data
+
+# Function to build the cache key from the workbook digest; the interval
+# settings applied at ingest change the cleaned data
+def get_cache_key(digest, plant=DEFAULT_PLANT):
+    key = f"v{CACHE_VERSION}_{digest}"
+    if plant.interval_hours is not None:
+        key += f"_h{plant.interval_hours:g}"
+    if plant.resample_minutes:
+        key += f"_r{plant.resample_minutes:g}"
+    return key
+
+def _remember(key, df):
+    with _cache_lock:
+        _memory_cache[key] = df
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MAX_CACHED_UPLOADS:
+            _memory_cache.popitem(last=False)
+
+# Function to return the cleaned data for a workbook, reusing earlier ingests of the same bytes
+def load_cleaned_data_cached(excel_file, use_disk=True, plant=DEFAULT_PLANT):
+    with span('load_cleaned_data_cached') as record:
+        df, record['source'] = _load_cleaned_data_cached(excel_file, use_disk, plant)
+        record['rows'] = len(df)
+    return df
+
+# Returns the cleaned data and where it came from ('memory', 'disk' or 'ingest')
+def _load_cleaned_data_cached(excel_file, use_disk, plant):
+    digest, data = _hash_upload_source(excel_file)
+    key = get_cache_key(digest, plant)
+
+    with _cache_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key], 'memory'
+
+    cache_folder = get_cache_folder()
+    if use_disk and frame_exists(key, folder=cache_folder):
+        file_path = get_frame_path(key, folder=cache_folder)
+        try:
+            df = load_frame(key, folder=cache_folder)
+            if list(df.columns) != CLEANED_COLUMNS:
+                raise ValueError(f"unexpected columns {list(df.columns)}")
+            df = compact_dtypes(df)
+            os.utime(file_path)
+            _remember(key, df)
+            return df, 'disk'
+        except Exception as e:
+            print(f"Ignoring unreadable cache file '{file_path}': {e}")
+
+    # Stream the workbook straight into the cache folder when possible, so the
+    # raw sheet is never held in memory as a whole
+    if data is None:
+        data = read_upload_bytes(excel_file)
+    df = None
+    if use_disk:
+        try:
+            ingest_excel_to_store(io.BytesIO(data), key, folder=cache_folder, plant=plant)
+            df = compact_dtypes(load_frame(key, folder=cache_folder))
+            evict_cache_files(cache_folder)
+        except (OSError, ImportError) as e:
+            print(f"Could not save cleaned data to the cache folder: {e}")
+
+    if df is None:
+        df = load_cleaned_data(io.BytesIO(data), plant)
+    _remember(key, df)
+    return df, 'ingest'
+
+# Function to list the cached frames as (modification time, size, path), oldest first
+def _cache_files(cache_folder):
+    files = []
+    for file_name in os.listdir(cache_folder):
+        if file_name.endswith(('.parquet', '.feather')):
+            file_path = os.path.join(cache_folder, file_name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue  # removed by another thread or process meanwhile
+            files.append((stat.st_mtime, stat.st_size, file_path))
+    return sorted(files)
+
+# Function to remove the files of older cache versions, then the least recently
+# used files until the folder fits in max_bytes
+def evict_cache_files(cache_folder=None, max_bytes=MAX_CACHE_BYTES):
+    cache_folder = cache_folder or get_cache_folder()
+    if not os.path.exists(cache_folder):
+        return 0
+
+    files = _cache_files(cache_folder)
+    total_bytes = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, file_path in files:
+        stale = not os.path.basename(file_path).startswith(f"v{CACHE_VERSION}_")
+        if not stale and total_bytes <= max_bytes:
+            continue
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            continue
+        total_bytes -= size
+        removed += 1
+    return removed
+
+def clear_cache(remove_files=False):
+    with _cache_lock:
+        _memory_cache.clear()
+
+    if remove_files:
+        evict_cache_files(max_bytes=0)
+
+# Main entry point: trim or empty the on-disk upload cache
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the cache of cleaned uploads in 'assets/cache'")
+    parser.add_argument('--max_mb', type=float, default=MAX_CACHE_BYTES / 2**20, help="Remove the least recently used files until the cache fits in this many MB")
+    parser.add_argument('--clear', action='store_true', help="Remove every cached file")
+
+    args = parser.parse_args()
+
+    if args.clear:
+        clear_cache(remove_files=True)
+        print(f"Cleared '{get_cache_folder()}'.")
+    else:
+        removed = evict_cache_files(max_bytes=int(args.max_mb * 2**20))
+        print(f"Removed {removed} file(s) from '{get_cache_folder()}'.")
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Lightweight stage instrumentation. A span times one stage and records the
+# rows it processed and, when memory tracing is on, its peak traced memory.
+# Every finished span is logged as one JSON line on the 'loss_analyzer'
+# logger and handed to the records being collected on the current thread
+# (the Streamlit performance panel collects one script run at a time).
+#
+# tracemalloc slows every allocation, so memory tracing is off unless
+# LOSS_ANALYZER_TRACE_MEMORY=1 or set_memory_tracing(True) turns it on. The
+# traced memory is process-wide, so peaks overlap when sessions run at once.
+
+logger = logging.getLogger('loss_analyzer')
+
+_local = threading.local()
+_memory_tracing = os.environ.get('LOSS_ANALYZER_TRACE_MEMORY', '0') == '1'
+
+def configure_logging(level=None):
+    # Log the spans to stderr; the level comes from LOSS_ANALYZER_LOG_LEVEL by default
+    level = level or os.environ.get('LOSS_ANALYZER_LOG_LEVEL', 'INFO')
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+def set_memory_tracing(enabled):
+    global _memory_tracing
+    _memory_tracing = enabled
+    if not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def memory_tracing_enabled():
+    return _memory_tracing
+
+def _open_spans():
+    if not hasattr(_local, 'open_spans'):
+        _local.open_spans = []
+    return _local.open_spans
+
+# Function to start collecting the spans finished on this thread (replaces an earlier collection)
+def start_collecting():
+    _local.records = []
+    return _local.records
+
+def stop_collecting():
+    records = getattr(_local, 'records', None) or []
+    _local.records = None
+    return records
+
+@contextmanager
+def span(stage, rows=None, **fields):
+    # The caller may fill in record['rows'] (or other fields) once the stage has run
+    record = {'stage': stage, 'rows': rows, **fields}
+    open_spans = _open_spans()
+    record['depth'] = len(open_spans)
+
+    trace_memory = _memory_tracing
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak is reset for this span, so hand the peak so far to the enclosing span
+        if open_spans:
+            open_spans[-1]['_peak_seen'] = max(open_spans[-1].get('_peak_seen', 0), peak)
+        tracemalloc.reset_peak()
+        record['_memory_start'] = current
+
+    open_spans.append(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record['seconds'] = time.perf_counter() - started
+        open_spans.pop()
+
+        memory_start = record.pop('_memory_start', None)
+        peak_seen = record.pop('_peak_seen', 0)
+        if trace_memory and tracemalloc.is_tracing() and memory_start is not None:
+            peak = max(tracemalloc.get_traced_memory()[1], peak_seen)
+            record['peak_mb'] = (peak - memory_start) / 2**20
+            if open_spans:
+                open_spans[-1]['_peak_seen'] = max(open_spans[-1].get('_peak_seen', 0), peak)
+
+        logger.info(json.dumps(record, default=str))
+        records = getattr(_local, 'records', None)
+        if records is not None:
+            records.append(record)
@@ -0,0 +1,75 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Background jobs for long analyses. A job runs on a small shared thread pool,
+# so the Streamlit script thread is never blocked and a rerun does not restart
+# the work: the page keeps the Job handle in st.session_state and picks up the
+# result on a later rerun. The function reports progress through the callback
+# it is given, and a cancelled job stops at its next progress report.
+
+MAX_JOB_WORKERS = int(os.environ.get('LOSS_ANALYZER_JOB_WORKERS', '2'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_JOB_WORKERS, thread_name_prefix='analysis-job')
+        return _executor
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    def __init__(self, fn, args=(), kwargs=None, details=None):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.details = details or {}   # e.g. the parameters the page needs with the result
+        self.state = 'pending'         # pending -> running -> done | failed | cancelled
+        self.stage = 'Waiting to start'
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self._cancel_requested = threading.Event()
+        self._future = None
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed', 'cancelled')
+
+    # Progress callback handed to the function; raises JobCancelled once cancel() was called
+    def report(self, stage, fraction):
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+        self.stage = stage
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+
+    def cancel(self):
+        self._cancel_requested.set()
+        if self._future is not None and self._future.cancel():
+            self.state = 'cancelled'
+
+    def _run(self):
+        if self._cancel_requested.is_set():
+            self.state = 'cancelled'
+            return
+        self.state = 'running'
+        try:
+            self.result = self.fn(*self.args, progress=self.report, **self.kwargs)
+            self.report('Done', 1.0)
+            self.state = 'done'
+        except JobCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+
+# Function to run fn(*args, progress=callback, **kwargs) in the background and return its Job
+def submit_job(fn, *args, details=None, **kwargs):
+    job = Job(fn, args, kwargs, details)
+    job._future = _get_executor().submit(job._run)
+    return job
@@ -0,0 +1,112 @@
+import argparse
+
+import pandas as pd
+
+from excel_to_csv import read_excel_data, iter_excel_chunks, EXCEL_CHUNK_ROWS
+from cleaning import split_date_time, clean_dataframe, resample_intervals, bucket_numbers
+from calculations import add_incremented_energy, filter_by_date_range
+from analysis import calculate_daily_losses
+from storage import FrameWriter
+from workspace import get_workspace_folder
+from schema import compact_dtypes
+from plant import PlantParameters, DEFAULT_PLANT
+from instrumentation import span, configure_logging
+
+# In-process version of the excel_to_csv -> cleaning -> calculations -> analysis
+# chain. Every stage hands its DataFrame straight to the next one, so there are
+# no child interpreters and no CSV files written between stages.
+
+CLEANED_COLUMNS = ['Date', 'Time Interval', 'Power MW', 'Energy MWh', 'interval_start', 'interval_minutes']
+CALCULATED_COLUMNS = ['Date', 'Time Interval', 'Power MW', 'Energy MWh', 'incremented_energy MWh', 'interval_start', 'interval_minutes']
+
+# Function to read the uploaded workbook and return the cleaned data
+def load_cleaned_data(excel_file, plant=DEFAULT_PLANT):
+    with span('read_excel') as record:
+        df = read_excel_data(excel_file)
+        record['rows'] = len(df)
+
+    # The dates are parsed once here, so the later stages compare them directly
+    with span('split_date_time', rows=len(df)):
+        df = split_date_time(df)
+    with span('clean_dataframe', rows=len(df)):
+        df = clean_dataframe(df, plant)
+    if plant.resample_minutes:
+        with span('resample_intervals', rows=len(df)):
+            df = resample_intervals(df, plant.resample_minutes)
+    with span('compact_dtypes', rows=len(df)):
+        return compact_dtypes(df[CLEANED_COLUMNS].reset_index(drop=True))
+
+# Function to stream the workbook through cleaning into the intermediate store
+# chunk by chunk, so peak memory does not grow with the length of the export
+def ingest_excel_to_store(excel_file, name='cleaned_data', fmt=None, folder=None, chunk_rows=EXCEL_CHUNK_ROWS, plant=DEFAULT_PLANT):
+    minutes = plant.resample_minutes
+    pending = None
+    with span('ingest_excel_to_store') as record, FrameWriter(name, fmt, folder) as writer:
+        for chunk in iter_excel_chunks(excel_file, chunk_rows):
+            cleaned_chunk = clean_dataframe(split_date_time(chunk), plant)
+
+            if minutes and not cleaned_chunk.empty:
+                # The last bucket may continue in the next chunk, so it is held back
+                if pending is not None:
+                    cleaned_chunk = pd.concat([pending, cleaned_chunk], ignore_index=True)
+                buckets = bucket_numbers(cleaned_chunk, minutes)
+                last_bucket = buckets == buckets.max()
+                pending = cleaned_chunk[last_bucket]
+                cleaned_chunk = resample_intervals(cleaned_chunk[~last_bucket], minutes)
+
+            writer.write(cleaned_chunk[CLEANED_COLUMNS])
+
+        if pending is not None:
+            writer.write(resample_intervals(pending, minutes)[CLEANED_COLUMNS])
+        record['rows'] = writer.rows_written
+
+    if writer.rows_written == 0:
+        raise ValueError("The workbook does not contain any valid rows.")
+    return writer.file_path
+
+def _no_progress(stage, fraction):
+    pass
+
+# Function to calculate the incremented energy and the daily losses for a date range;
+# progress(stage, fraction) is called before each stage (background jobs use it to cancel)
+def run_calculations(cleaned_df, increment_value, start_date, end_date, plant=DEFAULT_PLANT, progress=_no_progress):
+    progress('Filtering the date range', 0.0)
+    with span('filter_by_date_range', rows=len(cleaned_df)):
+        filtered_df = filter_by_date_range(cleaned_df, start_date, end_date)
+    progress('Adding the incremented energy', 0.2)
+    with span('add_incremented_energy', rows=len(filtered_df)):
+        calculated_df = add_incremented_energy(filtered_df.copy(), increment_value, plant)
+        calculated_df = calculated_df[CALCULATED_COLUMNS]
+
+    progress('Calculating the daily losses', 0.4)
+    with span('calculate_daily_losses', rows=len(calculated_df)):
+        analysed_df = calculate_daily_losses(calculated_df, plant.clipping_line)
+    if analysed_df is None:
+        raise ValueError("Daily losses could not be calculated for the selected data.")
+    return calculated_df, analysed_df
+
+# Function to run the whole chain from the workbook to the daily losses
+def run_pipeline(excel_file, increment_value, start_date, end_date, plant=DEFAULT_PLANT):
+    cleaned_df = load_cleaned_data(excel_file, plant)
+    return run_calculations(cleaned_df, increment_value, start_date, end_date, plant)
+
+# Main entry point: stream a workbook into the cleaned data store
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest an Excel workbook into the cleaned data store")
+    parser.add_argument('excel_file', type=str, help="Path to the .xlsx/.xls workbook")
+    parser.add_argument('--interval_hours', type=float, default=None, help="Length of one reading in hours (default: inferred from the timestamps)")
+    parser.add_argument('--resample_minutes', type=int, default=None, help="Aggregate finer readings to this interval in minutes")
+    parser.add_argument('--chunk_rows', type=int, default=EXCEL_CHUNK_ROWS, help="Rows read from the workbook per chunk")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default=None, help="Intermediate storage format")
+    parser.add_argument('--workspace', type=str, default=None, help="Keep the files in 'assets/workspaces/<name>' instead of the shared assets folder")
+    
+    args = parser.parse_args()
+
+    configure_logging()
+    try:
+        folder = get_workspace_folder(args.workspace) if args.workspace else None
+        plant = PlantParameters(interval_hours=args.interval_hours, resample_minutes=args.resample_minutes)
+        cleaned_file_path = ingest_excel_to_store(args.excel_file, fmt=args.format, folder=folder, chunk_rows=args.chunk_rows, plant=plant)
+        print(f"Cleaned data saved to '{cleaned_file_path}'!")
+    except Exception as e:
+        print(f"An error occurred: {e}")
@@ -0,0 +1,38 @@
+from dataclasses import dataclass, replace
+
+# Parameters that differ between plants. They are passed through cleaning,
+# calculations, analysis and display instead of being hard-coded. The
+# increment scaling reduces to one scale factor per run, so the single-plant,
+# sweep and batch paths all share the same kernels.
+#
+# The reading length is taken from each row's own timestamps unless
+# interval_hours overrides it. With resample_minutes set, finer readings
+# (1- or 5-minute exports) are summed into that interval at ingest.
+#
+# The clipping line is a power limit, so it holds for any reading length: a
+# reading of h hours is clipped at clipping_line * h MWh. The default 110 MW
+# is the original 27.5 MWh per 15-minute reading.
+
+@dataclass(frozen=True)
+class PlantParameters:
+    base_capacity: float = 140.0   # installed capacity the increment is added to (MW)
+    clipping_line: float = 110.0   # export/inverter limit (MW)
+    interval_hours: float = None   # length of one reading (hours, whole minutes); None infers it from the timestamps
+    resample_minutes: int = None   # aggregate finer readings to this interval at ingest
+
+    def __post_init__(self):
+        if self.base_capacity <= 0:
+            raise ValueError("The base capacity must be greater than zero.")
+        if self.interval_hours is not None and (self.interval_hours <= 0 or not float(self.interval_hours * 60).is_integer()):
+            raise ValueError("The interval length must be a whole number of minutes greater than zero.")
+        if self.resample_minutes is not None and (self.resample_minutes <= 0 or (24 * 60) % self.resample_minutes):
+            raise ValueError("The resampling interval must be a whole number of minutes that divides a day.")
+
+    # Incremented energy = energy * scale_factor; works for scalars and arrays
+    def scale_factor(self, increment_value):
+        return (self.base_capacity + increment_value) / self.base_capacity
+
+    def with_changes(self, **changes):
+        return replace(self, **changes)
+
+DEFAULT_PLANT = PlantParameters()
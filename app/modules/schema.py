@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# Compact in-memory layout of the cleaned and calculated data:
+#   'Power MW', 'Energy MWh', 'incremented_energy MWh' -> float32
+#   'Time Interval'                                    -> categorical (one code per row)
+#   'Date'                                             -> int32 day number (days since 1970-01-01)
+#   'interval_minutes'                                 -> int16 reading length; the end of a
+#                                                         reading is interval_start plus this
+# float32 keeps about 7 significant digits, far more than the SCADA readings
+# carry. Totals are still accumulated in float64 by the loss kernels.
+
+FLOAT32_COLUMNS = ['Power MW', 'Energy MWh', 'incremented_energy MWh']
+
+# Function to convert a frame to the compact dtypes (columns it does not know are left alone)
+def compact_dtypes(df):
+    df = df.copy()
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(np.float32)
+    if 'Time Interval' in df.columns and not isinstance(df['Time Interval'].dtype, pd.CategoricalDtype):
+        df['Time Interval'] = df['Time Interval'].astype('category')
+    if 'Date' in df.columns:
+        df['Date'] = day_numbers(df['Date']).astype(np.int32)
+    if 'interval_minutes' in df.columns:
+        df['interval_minutes'] = df['interval_minutes'].astype(np.int16)
+    return df
+
+# Function to get the day numbers of a 'Date' column stored either as datetimes or as day numbers
+def day_numbers(values):
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(dtype=np.int64)
+    return values.to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+# Function to turn a date, Timestamp or 'dd-mm-yyyy'/'yyyy-mm-dd' string into a day number
+def to_day_number(value):
+    if isinstance(value, str):
+        try:
+            value = pd.to_datetime(value, format='%d-%m-%Y')
+        except ValueError:
+            value = pd.Timestamp(value)
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+def day_number_to_date(day_number):
+    return np.datetime64(int(day_number), 'D').astype(object)
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from analysis import clipped_losses
+from schema import day_numbers, to_day_number
+from cleaning import reading_hours
+from plant import DEFAULT_PLANT
+
+# Losses for many increment values at once. Instead of running
+# add_incremented_energy and calculate_daily_losses once per increment, the
+# energy column is broadcast against all the increments as one
+# (rows x increments) array, processed in chunks of whole days so memory stays
+# bounded however many increments are requested.
+
+# Upper bound on the number of (row, increment) cells held in memory at once
+MAX_SWEEP_CELLS = 2_000_000
+
+# Function to sort the rows by day and find where each day starts
+def _group_rows_by_day(df):
+    df = df.sort_values('Date', kind='stable')
+    days, day_starts = np.unique(day_numbers(df['Date']), return_index=True)
+    energy = df['Energy MWh'].to_numpy(dtype=np.float64)
+    return days, day_starts, energy, reading_hours(df)
+
+# Function to sum the clipped loss per day for every scale factor, chunk by chunk;
+# limits holds the clipping line in MWh for every row
+def _daily_clipped_losses(energy, day_starts, scale, limits, max_cells):
+    n_rows = len(energy)
+    n_days = len(day_starts)
+    day_ends = np.append(day_starts[1:], n_rows)
+    rows_per_chunk = max(max_cells // len(scale), int((day_ends - day_starts).max()))
+
+    losses = np.zeros((n_days, len(scale)))
+    first_day = 0
+    while first_day < n_days:
+        # Take as many whole days as fit in the chunk (at least one)
+        first_row = day_starts[first_day]
+        last_day = max(np.searchsorted(day_ends, first_row + rows_per_chunk, side='right'), first_day + 1)
+        last_row = day_ends[last_day - 1]
+
+        chunk_energy = energy[first_row:last_row, None]
+        incremented = chunk_energy * scale[None, :]
+
+        clipped = clipped_losses(chunk_energy, incremented, limits[first_row:last_row, None])
+        losses[first_day:last_day] = np.add.reduceat(clipped, day_starts[first_day:last_day] - first_row, axis=0)
+        first_day = last_day
+    return losses
+
+# Function to calculate daily and total losses for a list of increment values
+def sweep_increments(df, increment_values, plant=DEFAULT_PLANT, max_cells=MAX_SWEEP_CELLS):
+    increments = np.asarray(increment_values, dtype=np.float64).ravel()
+    columns = ['Loss_Without_Clipping', 'Loss_With_Clipping', 'Loss_Difference']
+
+    if df.empty or len(increments) == 0:
+        daily = pd.DataFrame(columns=['Day', 'increment_value'] + columns)
+        totals = pd.DataFrame(columns=['increment_value'] + columns)
+        return daily, totals
+
+    days, day_starts, energy, hours = _group_rows_by_day(df)
+    scale = plant.scale_factor(increments)
+
+    # Without clipping the loss is linear in the energy, so only the daily
+    # energy totals are needed
+    daily_energy = np.add.reduceat(energy, day_starts)
+    loss_without = daily_energy[:, None] * (scale - 1.0)[None, :]
+    loss_with = _daily_clipped_losses(energy, day_starts, scale, plant.clipping_line * hours, max_cells)
+    loss_difference = loss_without - loss_with
+
+    # One row per (day, increment)
+    daily = pd.DataFrame({
+        'Day': np.repeat(days, len(increments)).astype('datetime64[D]').astype('datetime64[ns]'),
+        'increment_value': np.tile(increments, len(days)),
+        'Loss_Without_Clipping': loss_without.ravel(),
+        'Loss_With_Clipping': loss_with.ravel(),
+        'Loss_Difference': loss_difference.ravel(),
+    })
+    totals = pd.DataFrame({
+        'increment_value': increments,
+        'Loss_Without_Clipping': loss_without.sum(axis=0),
+        'Loss_With_Clipping': loss_with.sum(axis=0),
+        'Loss_Difference': loss_difference.sum(axis=0),
+    })
+    return daily, totals
+
+# Function to sum the clipped loss of sorted energy values for every (scale factor, limit) pair
+def _total_clipped_losses(energy, scale, limit):
+    # With the energy values sorted and their prefix sums P, the clipped loss
+    # for a scale factor s and a limit L in MWh is closed-form:
+    #   rows with E <= L / s contribute s * E - E
+    #   rows with L / s < E <= L contribute L - E
+    #   rows with E > L contribute nothing
+    # so every grid point costs two binary searches instead of a pass over the rows
+    prefix = np.concatenate(([0.0], np.cumsum(energy)))
+
+    rows_below_line = np.searchsorted(energy, limit, side='right')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cut = np.where(scale > 0, limit / scale, np.inf)
+    rows_below_cut = np.minimum(np.searchsorted(energy, cut, side='right'), rows_below_line)
+
+    return (
+        scale * prefix[rows_below_cut]
+        + limit * (rows_below_line - rows_below_cut)
+        - prefix[rows_below_line]
+    )
+
+# Function to calculate total losses over a grid of increment values and clipping
+# lines (MW), between start_date and end_date (inclusive; None leaves that side open)
+def sweep_clipping_lines(df, increment_values, clipping_lines, plant=DEFAULT_PLANT, start_date=None, end_date=None):
+    increments = np.asarray(increment_values, dtype=np.float64).ravel()
+    lines = np.asarray(clipping_lines, dtype=np.float64).ravel()
+
+    if start_date is not None or end_date is not None:
+        days = day_numbers(df['Date'])
+        in_range = np.ones(len(df), dtype=bool)
+        if start_date is not None:
+            in_range &= days >= to_day_number(start_date)
+        if end_date is not None:
+            in_range &= days <= to_day_number(end_date)
+        df = df[in_range]
+
+    energy = df['Energy MWh'].to_numpy(dtype=np.float64)
+    hours = reading_hours(df)
+    scale = plant.scale_factor(increments)[:, None]
+
+    # The limit in MWh depends on the reading length, so each length is summed on its own
+    loss_with = np.zeros((len(increments), len(lines)))
+    for length in np.unique(hours):
+        loss_with += _total_clipped_losses(np.sort(energy[hours == length]), scale, lines[None, :] * length)
+    loss_without = np.broadcast_to((scale - 1.0) * energy.sum(), loss_with.shape)
+
+    return pd.DataFrame({
+        'increment_value': np.repeat(increments, len(lines)),
+        'clipping_line': np.tile(lines, len(increments)),
+        'Loss_Without_Clipping': loss_without.ravel(),
+        'Loss_With_Clipping': loss_with.ravel(),
+        'Loss_Difference': (loss_without - loss_with).ravel(),
+    })
@@ -0,0 +1,211 @@
+import io
+import json
+import zipfile
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+from pipeline import run_calculations
+from ingest_cache import load_cleaned_data_cached
+from batch import load_plants, PLANT_DEFAULTS
+from schema import day_numbers, day_number_to_date, to_day_number
+from plant import PlantParameters
+from instrumentation import span, configure_logging
+
+# Headless HTTP/JSON service for the scheduler and BI tools. It runs the same
+# in-process pipeline as the Streamlit page, in a pool of threads inside one
+# long-lived process. Cleaned data is shared through the upload cache, so a
+# plant or workbook that was seen before is not read and cleaned again.
+#
+#   GET  /health                  -> {"status": "ok"}
+#   GET  /plants                  -> the plants of the manifest given at start-up
+#   POST /losses                  -> daily losses
+#        JSON body {"plant_id": ..., "increment_value": ..., "clipping_line": ...,
+#                   "base_capacity": ..., "start_date": ..., "end_date": ...}
+#        or the workbook itself as the body, with the same fields in the query string
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+MAX_BODY_BYTES = 256 * 2**20
+
+HTTP_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _optional_float(value):
+    return None if value is None or value == '' else float(value)
+
+class LossService:
+    def __init__(self, plants=None, max_workers=None):
+        self.plants = {str(plant['plant_id']): plant for plant in (plants or [])}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='loss-service')
+
+    # Function run in a worker thread: daily losses for one request
+    def calculate(self, fields, workbook_bytes=None):
+        if workbook_bytes is not None:
+            settings = {**PLANT_DEFAULTS, 'plant_id': fields.get('plant_id')}
+            source = io.BytesIO(workbook_bytes)
+        else:
+            plant_id = fields.get('plant_id')
+            if plant_id is None:
+                raise RequestError(400, "Send a workbook or a 'plant_id'.")
+            if str(plant_id) not in self.plants:
+                raise RequestError(404, f"Unknown plant '{plant_id}'.")
+            settings = dict(self.plants[str(plant_id)])
+            source = settings['workbook']
+        settings.update({key: value for key, value in fields.items() if value is not None})
+
+        try:
+            plant = PlantParameters(
+                base_capacity=float(settings['base_capacity']),
+                clipping_line=float(settings['clipping_line']),
+                interval_hours=_optional_float(settings.get('interval_hours')),
+                resample_minutes=_optional_float(settings.get('resample_minutes')),
+            )
+            increment_value = float(settings['increment_value'])
+        except (TypeError, ValueError) as e:
+            raise RequestError(400, f"Invalid parameters: {e}")
+
+        with span('service_request', plant_id=settings.get('plant_id')) as record:
+            try:
+                cleaned_df = load_cleaned_data_cached(source, plant=plant)
+            except (ValueError, zipfile.BadZipFile) as e:
+                # The workbook itself is unreadable or has no valid rows
+                raise RequestError(400, f"Invalid workbook: {e}")
+
+            days = day_numbers(cleaned_df['Date'])
+            start_date = settings.get('start_date') or day_number_to_date(days.min())
+            end_date = settings.get('end_date') or day_number_to_date(days.max())
+            try:
+                to_day_number(start_date), to_day_number(end_date)
+            except (TypeError, ValueError) as e:
+                raise RequestError(400, f"Invalid date: {e}")
+            try:
+                _, daily_losses = run_calculations(cleaned_df, increment_value, start_date, end_date, plant)
+            except ValueError as e:
+                raise RequestError(400, str(e))
+            record['rows'] = len(cleaned_df)
+
+        daily_losses = daily_losses.assign(Day=daily_losses['Day'].dt.strftime('%Y-%m-%d'))
+        return {
+            'plant_id': settings.get('plant_id'),
+            'parameters': {
+                'increment_value': increment_value,
+                'clipping_line': plant.clipping_line,
+                'base_capacity': plant.base_capacity,
+                'interval_hours': plant.interval_hours,
+                'resample_minutes': plant.resample_minutes,
+                'start_date': str(start_date),
+                'end_date': str(end_date),
+            },
+            'totals': {
+                column: float(daily_losses[column].sum())
+                for column in ['Loss_Without_Clipping', 'Loss_With_Clipping', 'Loss_Difference']
+            },
+            'daily_losses': daily_losses.to_dict('records'),
+        }
+
+    # Function to route one parsed request; returns (status, payload)
+    async def handle(self, method, target, headers, body):
+        url = urlsplit(target)
+        fields = dict(parse_qsl(url.query))
+
+        if url.path == '/health':
+            return 200, {'status': 'ok'}
+        if url.path == '/plants':
+            return 200, {'plants': [
+                {key: value for key, value in plant.items() if key != 'workbook'}
+                for plant in self.plants.values()
+            ]}
+        if url.path != '/losses':
+            raise RequestError(404, f"Unknown path '{url.path}'.")
+        if method != 'POST':
+            raise RequestError(405, "Use POST for /losses.")
+
+        workbook_bytes = None
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError as e:
+                raise RequestError(400, f"Invalid JSON body: {e}")
+            if not isinstance(payload, dict):
+                raise RequestError(400, "The JSON body must be an object.")
+            fields.update(payload)
+        elif body:
+            workbook_bytes = body
+
+        loop = asyncio.get_running_loop()
+        return 200, await loop.run_in_executor(self.executor, self.calculate, fields, workbook_bytes)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            status, payload = await self._respond(reader)
+        except RequestError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+
+        body = json.dumps(payload, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        try:
+            method, target, _ = request_line.split(' ', 2)
+        except ValueError:
+            raise RequestError(400, "Malformed request line.")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length header.")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"The body is larger than {MAX_BODY_BYTES} bytes.")
+        body = await reader.readexactly(length) if length else b''
+        return await self.handle(method.upper(), target, headers, body)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Loss service listening on http://{host}:{port} ({len(self.plants)} plants)")
+        async with server:
+            await server.serve_forever()
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON service for the daily loss analysis")
+    parser.add_argument('--plants', type=str, default=None, help="Directory of workbooks, or a .csv/.json manifest as used by 'batch.py'")
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--workers', type=int, default=None, help="Calculation threads (default: chosen by Python)")
+
+    args = parser.parse_args()
+
+    configure_logging()
+    service = LossService(load_plants(args.plants) if args.plants else [], args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
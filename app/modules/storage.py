@@ -0,0 +1,153 @@
+import os
+import uuid
+
+import pandas as pd
+
+# Intermediate store shared by the pipeline stages. Parquet and Feather (Arrow
+# IPC) keep the datetime and float columns typed, so a stage can load the
+# previous stage's output without re-parsing text or dates. CSV is only offered
+# through export_csv() for people who want to open the data in a spreadsheet.
+
+# Both columnar formats need pyarrow
+FORMAT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'feather': '.feather',
+}
+
+DEFAULT_FORMAT = os.environ.get('LOSS_ANALYZER_STORAGE_FORMAT', 'parquet')
+
+def get_assets_folder():
+    return os.path.abspath(os.path.join(os.getcwd(), '../../assets'))
+
+def _check_format(fmt):
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown storage format '{fmt}'. Use one of: {', '.join(FORMAT_EXTENSIONS)}")
+    return fmt
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("The 'pyarrow' package is required for Parquet/Feather storage. Install it with 'pip install pyarrow'.")
+
+def get_frame_path(name, fmt=None, folder=None):
+    fmt = _check_format(fmt)
+    folder = folder or get_assets_folder()
+    return os.path.join(folder, name + FORMAT_EXTENSIONS[fmt])
+
+def frame_exists(name, fmt=None, folder=None):
+    return os.path.exists(get_frame_path(name, fmt, folder))
+
+# Temporary file next to file_path that no other writer in this process (or
+# any other) uses; sessions and service threads share one pid
+def _temp_path(file_path):
+    return f"{file_path}.{uuid.uuid4().hex}.tmp"
+
+# Function to save a DataFrame under 'name' in the given (or default) format
+def save_frame(df, name, fmt=None, folder=None):
+    fmt = _check_format(fmt)
+    _require_pyarrow()
+
+    folder = folder or get_assets_folder()
+    os.makedirs(folder, exist_ok=True)
+
+    # Write to a temporary file first so readers never see a half-written file
+    file_path = get_frame_path(name, fmt, folder)
+    temp_path = _temp_path(file_path)
+    df = df.reset_index(drop=True)
+    try:
+        if fmt == 'parquet':
+            df.to_parquet(temp_path, index=False)
+        else:
+            df.to_feather(temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return file_path
+
+# Function to load a DataFrame saved with save_frame
+def load_frame(name, fmt=None, folder=None, columns=None):
+    fmt = _check_format(fmt)
+    _require_pyarrow()
+
+    file_path = get_frame_path(name, fmt, folder)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"'{os.path.basename(file_path)}' not found in '{os.path.dirname(file_path)}'.")
+
+    if fmt == 'parquet':
+        return pd.read_parquet(file_path, columns=columns)
+    return pd.read_feather(file_path, columns=columns)
+
+class FrameWriter:
+    # Writes a frame to the store one chunk at a time (Parquet row groups or
+    # Arrow IPC record batches), so the whole frame never has to be in memory.
+    # Use it as a context manager; the file only appears once it is closed.
+    def __init__(self, name, fmt=None, folder=None):
+        self.fmt = _check_format(fmt)
+        _require_pyarrow()
+
+        folder = folder or get_assets_folder()
+        os.makedirs(folder, exist_ok=True)
+
+        self.file_path = get_frame_path(name, self.fmt, folder)
+        self.temp_path = _temp_path(self.file_path)
+        self.schema = None
+        self.rows_written = 0
+        self._writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+
+        if df.empty:
+            return
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.schema = table.schema
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.temp_path, self.schema)
+            else:
+                self._writer = pa.ipc.new_file(self.temp_path, self.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+
+        self._writer.write_table(table)
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        os.replace(self.temp_path, self.file_path)
+        return self.file_path
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+# Function to export a DataFrame as CSV next to the intermediate files
+def export_csv(df, name, folder=None):
+    folder = folder or get_assets_folder()
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    file_path = os.path.join(folder, name + '.csv')
+    df.to_csv(file_path, index=False)
+    return file_path
@@ -0,0 +1,30 @@
+import importlib
+import threading
+
+# The Streamlit server is the one long-lived worker: uploads and clicks run in
+# it instead of in new interpreters. The heavy modules that the first page
+# does not need (Plotly, the Parquet and Excel readers) are imported on a
+# background thread right after start-up. The first page is not held up by
+# them, and they are already loaded by the first click.
+
+WARM_MODULES = ['plotly.graph_objects', 'pyarrow', 'pyarrow.parquet', 'openpyxl']
+
+_warm_lock = threading.Lock()
+_warm_thread = None
+
+def _import_all(modules):
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            # Missing optional packages are reported where they are actually used
+            pass
+
+# Function to start warming the modules once per process; returns the warm-up thread
+def warm_up(modules=WARM_MODULES):
+    global _warm_thread
+    with _warm_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_import_all, args=(list(modules),), name='warm-up', daemon=True)
+            _warm_thread.start()
+    return _warm_thread
@@ -0,0 +1,101 @@
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from storage import get_assets_folder, save_frame, load_frame
+
+# Each Streamlit session (or CLI run given --workspace) gets its own workspace
+# in place of the shared 'assets' folder, so concurrent analysts never touch
+# each other's data. Frames are kept in memory. A workspace created with
+# spill_rows set writes frames of that many rows or more to its own folder under
+# 'assets/workspaces/<id>' and reloads them when they are next needed.
+
+# Row count from which frames are spilled to disk; unset keeps everything in memory
+DEFAULT_SPILL_ROWS = int(os.environ['LOSS_ANALYZER_SPILL_ROWS']) if os.environ.get('LOSS_ANALYZER_SPILL_ROWS') else None
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+
+def get_workspaces_folder():
+    return os.path.join(get_assets_folder(), 'workspaces')
+
+def get_workspace_folder(workspace_id):
+    # Workspace ids become folder names, so only allow plain names
+    if not re.fullmatch(r'[A-Za-z0-9_-]+', workspace_id):
+        raise ValueError(f"Invalid workspace id '{workspace_id}'. Use letters, digits, '-' and '_' only.")
+    return os.path.join(get_workspaces_folder(), workspace_id)
+
+class Workspace:
+    def __init__(self, workspace_id, spill_rows=DEFAULT_SPILL_ROWS):
+        self.workspace_id = workspace_id
+        self.folder = get_workspace_folder(workspace_id)
+        self.spill_rows = spill_rows
+        self.last_used = time.monotonic()
+        self._frames = {}
+        self._spilled = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._frames or name in self._spilled
+
+    def put(self, name, df):
+        with self._lock:
+            self.last_used = time.monotonic()
+            self._spilled.discard(name)
+            if self.spill_rows is not None and len(df) >= self.spill_rows:
+                save_frame(df, name, folder=self.folder)
+                self._frames.pop(name, None)
+                self._spilled.add(name)
+            else:
+                self._frames[name] = df
+
+    def get(self, name, default=None):
+        with self._lock:
+            self.last_used = time.monotonic()
+            if name in self._frames:
+                return self._frames[name]
+            if name in self._spilled:
+                return load_frame(name, folder=self.folder)
+            return default
+
+    def remove(self, name):
+        with self._lock:
+            self._frames.pop(name, None)
+            self._spilled.discard(name)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._spilled.clear()
+            if os.path.exists(self.folder):
+                shutil.rmtree(self.folder, ignore_errors=True)
+
+# Function to get a session's workspace, creating it (with a new id if none is given) on first use
+def get_workspace(workspace_id=None, spill_rows=DEFAULT_SPILL_ROWS):
+    workspace_id = workspace_id or uuid.uuid4().hex
+    with _workspaces_lock:
+        workspace = _workspaces.get(workspace_id)
+        if workspace is None:
+            workspace = Workspace(workspace_id, spill_rows)
+            _workspaces[workspace_id] = workspace
+        return workspace
+
+def close_workspace(workspace_id):
+    with _workspaces_lock:
+        workspace = _workspaces.pop(workspace_id, None)
+    if workspace is not None:
+        workspace.clear()
+
+# Function to drop the workspaces of sessions that have gone quiet
+def close_idle_workspaces(max_idle_seconds):
+    now = time.monotonic()
+    with _workspaces_lock:
+        idle_ids = [workspace_id for workspace_id, workspace in _workspaces.items()
+                    if now - workspace.last_used > max_idle_seconds]
+    for workspace_id in idle_ids:
+        close_workspace(workspace_id)
+    return idle_ids
@@ -0,0 +1,56 @@
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+REPO_FOLDER = os.path.dirname(BENCHMARKS_FOLDER)
+sys.path.insert(0, os.path.join(REPO_FOLDER, 'app', 'modules'))
+
+from pipeline import load_cleaned_data, ingest_excel_to_store
+from storage import load_frame
+from schema import compact_dtypes
+
+# Checks that the streaming ingest (openpyxl, chunk by chunk) gives the same
+# cleaned data as the whole-sheet pd.read_excel path. Real exports carry
+# quirks the generated workbooks do not, such as trailing empty columns, so
+# it runs on the bundled sample workbook by default.
+
+DEFAULT_WORKBOOK = os.path.join(REPO_FOLDER, 'project_1_data.xlsx')
+
+def check_workbook(workbook, chunk_rows=5_000):
+    expected = load_cleaned_data(workbook)
+    with tempfile.TemporaryDirectory() as folder:
+        ingest_excel_to_store(workbook, 'streamed', folder=folder, chunk_rows=chunk_rows)
+        streamed = compact_dtypes(load_frame('streamed', folder=folder))
+
+    problems = []
+    if len(streamed) != len(expected):
+        problems.append(f"{len(streamed)} rows streamed, {len(expected)} read whole")
+    else:
+        for column in expected.columns:
+            left, right = streamed[column], expected[column]
+            if column in ('Power MW', 'Energy MWh'):
+                same = np.allclose(left.to_numpy(np.float64), right.to_numpy(np.float64))
+            else:
+                same = (left.astype(str).to_numpy() == right.astype(str).to_numpy()).all()
+            if not same:
+                problems.append(f"column '{column}' differs")
+    return len(expected), problems
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the streaming ingest with pd.read_excel")
+    parser.add_argument('workbooks', nargs='*', default=[DEFAULT_WORKBOOK], help="Workbooks to check (default: the sample workbook)")
+    parser.add_argument('--chunk_rows', type=int, default=5_000, help="Rows per streamed chunk")
+
+    args = parser.parse_args()
+
+    failed = 0
+    for workbook in args.workbooks:
+        rows, problems = check_workbook(workbook, args.chunk_rows)
+        failed += bool(problems)
+        print(f"[{'failed' if problems else 'ok'}] {workbook}: {rows} rows" + "".join(f"\n    {p}" for p in problems))
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,73 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+REPO_FOLDER = os.path.dirname(BENCHMARKS_FOLDER)
+sys.path.insert(0, os.path.join(REPO_FOLDER, 'app', 'modules'))
+
+from pipeline import load_cleaned_data, run_calculations
+from sensitivity import sweep_increments, sweep_clipping_lines
+from schema import day_numbers, day_number_to_date, to_day_number
+from plant import DEFAULT_PLANT
+
+# Checks the closed-form clipping-line sweep and the increment sweep against
+# the row kernel (run_calculations) on every point of a small grid, over the
+# whole history and over one month of it.
+
+DEFAULT_WORKBOOK = os.path.join(REPO_FOLDER, 'project_1_data.xlsx')
+CHECK_INCREMENTS = [1, 5, 20, 50]
+CHECK_CLIPPING_LINES = [80.0, DEFAULT_PLANT.clipping_line, 130.0]
+COLUMNS = ['Loss_Without_Clipping', 'Loss_With_Clipping', 'Loss_Difference']
+
+# Relative tolerance; the data is float32 and the sums run in a different order
+TOLERANCE = 1e-5
+
+def check_workbook(workbook, resample_minutes=None):
+    plant = DEFAULT_PLANT.with_changes(resample_minutes=resample_minutes)
+    cleaned_df = load_cleaned_data(workbook, plant)
+    days = day_numbers(cleaned_df['Date'])
+    ranges = [
+        (day_number_to_date(days.min()), day_number_to_date(days.max())),
+        (day_number_to_date(days.min()), day_number_to_date(days.min() + 30)),
+    ]
+
+    problems = []
+    for start_date, end_date in ranges:
+        grid = sweep_clipping_lines(cleaned_df, CHECK_INCREMENTS, CHECK_CLIPPING_LINES, plant, start_date, end_date)
+        for clipping_line in CHECK_CLIPPING_LINES:
+            line_plant = plant.with_changes(clipping_line=clipping_line)
+            in_range = (days >= to_day_number(start_date)) & (days <= to_day_number(end_date))
+            _, sweep_totals = sweep_increments(cleaned_df[in_range], CHECK_INCREMENTS, line_plant)
+
+            for increment_value in CHECK_INCREMENTS:
+                _, daily_losses = run_calculations(cleaned_df, increment_value, start_date, end_date, line_plant)
+                expected = daily_losses[COLUMNS].sum().to_numpy()
+                point = grid[(grid['increment_value'] == increment_value) & (grid['clipping_line'] == clipping_line)]
+                swept = sweep_totals[sweep_totals['increment_value'] == increment_value]
+
+                for name, result in (('sweep_clipping_lines', point), ('sweep_increments', swept)):
+                    values = result[COLUMNS].to_numpy()[0]
+                    if not np.allclose(values, expected, rtol=TOLERANCE, atol=TOLERANCE):
+                        problems.append(
+                            f"{name} at increment {increment_value}, line {clipping_line:g} MW, "
+                            f"{start_date}..{end_date}: {values.round(3).tolist()} != {expected.round(3).tolist()}"
+                        )
+    return len(ranges) * len(CHECK_INCREMENTS) * len(CHECK_CLIPPING_LINES), problems
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the loss sweeps with the row kernel")
+    parser.add_argument('workbooks', nargs='*', default=[DEFAULT_WORKBOOK], help="Workbooks to check (default: the sample workbook)")
+    parser.add_argument('--resample_minutes', type=int, default=None, help="Aggregate the readings to this interval first")
+
+    args = parser.parse_args()
+
+    failed = 0
+    for workbook in args.workbooks:
+        points, problems = check_workbook(workbook, args.resample_minutes)
+        failed += bool(problems)
+        print(f"[{'failed' if problems else 'ok'}] {workbook}: {points} grid points" + "".join(f"\n    {p}" for p in problems))
+    raise SystemExit(1 if failed else 0)
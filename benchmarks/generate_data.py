@@ -0,0 +1,76 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Synthetic SCADA exports for benchmarking. Each plant gets a 15-minute solar
+# profile in the same 'Time' / 'Power MW' layout as the real exports: a
+# seasonal bell-shaped day, cloudy days and passing clouds, small negative
+# readings at night and a few missing values.
+
+INTERVAL_MINUTES = 15
+INTERVALS_PER_DAY = 24 * 60 // INTERVAL_MINUTES
+
+# Function to build the 'dd-mm-yyyy HH:MM-HH:MM' labels for every interval of the given days
+def time_labels(days):
+    day_text = pd.DatetimeIndex(days).strftime('%d-%m-%Y').to_numpy(dtype=object)
+    minutes = np.arange(INTERVALS_PER_DAY) * INTERVAL_MINUTES
+    starts = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in minutes], dtype=object)
+    ends = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in minutes + INTERVAL_MINUTES], dtype=object)
+    intervals = starts + '-' + ends
+    return (np.repeat(day_text, INTERVALS_PER_DAY) + ' ' + np.tile(intervals, len(days))).astype(str)
+
+# Function to generate one plant's export for `years` years starting on 1 April of start_year
+def generate_plant_data(years=1, start_year=2024, capacity_mw=140.0, nan_fraction=0.001, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(year=start_year, month=4, day=1)
+    days = pd.date_range(start, start + pd.DateOffset(years=years) - pd.Timedelta(days=1), freq='D')
+
+    # Day length and peak follow the season; cloudy days scale the whole day down
+    day_of_year = days.dayofyear.to_numpy()
+    season = np.cos(2 * np.pi * (day_of_year - 172) / 365.25)
+    sunrise = 6.2 - 0.6 * season
+    sunset = 18.3 + 0.6 * season
+    peak = capacity_mw * (0.75 + 0.08 * season) * rng.beta(5, 1.5, len(days))
+
+    hours = (np.arange(INTERVALS_PER_DAY) + 0.5) * INTERVAL_MINUTES / 60
+    phase = (hours[None, :] - sunrise[:, None]) / (sunset - sunrise)[:, None]
+    daylight = (phase > 0) & (phase < 1)
+    shape = np.where(daylight, np.sin(np.pi * np.clip(phase, 0, 1)) ** 1.5, 0.0)
+
+    # Passing clouds only during the day; night readings are the small auxiliary draw
+    clouds = 1 - 0.35 * rng.beta(0.6, 4, shape.shape)
+    power = peak[:, None] * shape * clouds
+    night = -(0.25 + 0.05 * rng.random(shape.shape))
+    power = np.where(daylight, power, night).ravel()
+
+    missing = rng.random(len(power)) < nan_fraction
+    power[missing] = np.nan
+
+    return pd.DataFrame({'Time': time_labels(days), 'Power MW': np.round(power, 5)})
+
+# Function to write one workbook per plant and return their paths
+def write_workbooks(folder, plants=1, years=1, start_year=2024, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for plant in range(plants):
+        df = generate_plant_data(years, start_year, seed=seed + plant)
+        path = os.path.join(folder, f"plant_{plant + 1:02d}_{years}y.xlsx")
+        df.to_excel(path, index=False)
+        paths.append(path)
+    return paths
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic 15-minute SCADA exports")
+    parser.add_argument('output_folder', type=str, help="Folder for the generated workbooks")
+    parser.add_argument('--plants', type=int, default=1, help="Number of plants")
+    parser.add_argument('--years', type=int, default=1, help="Years of data per plant")
+    parser.add_argument('--start_year', type=int, default=2024, help="The data starts on 1 April of this year")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the first plant")
+
+    args = parser.parse_args()
+
+    for path in write_workbooks(args.output_folder, args.plants, args.years, args.start_year, args.seed):
+        print(f"Generated '{path}'.")
@@ -0,0 +1,152 @@
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from statistics import median
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+REPO_FOLDER = os.path.dirname(BENCHMARKS_FOLDER)
+sys.path.insert(0, os.path.join(REPO_FOLDER, 'app', 'modules'))
+
+from generate_data import write_workbooks
+from excel_to_csv import convert_excel_to_csv
+from cleaning import split_date_time, clean_dataframe
+from calculations import add_incremented_energy
+from analysis import calculate_daily_losses
+from pipeline import run_pipeline, ingest_excel_to_store
+from schema import day_numbers, day_number_to_date
+
+# Times every stage of the loss analysis on synthetic plants and writes the
+# timings to a JSON file. Run it on two commits and pass the older file as
+# --baseline to see the change per stage.
+#
+# The modules resolve the assets folder from the working directory, so the
+# benchmark runs inside a scratch copy of the folder layout and never touches
+# the real assets.
+
+INCREMENT_VALUE = 5
+
+# Function to time fn(*args) `repeat` times; setup() builds fresh arguments outside the timing
+def time_stage(fn, setup=lambda: (), repeat=3):
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        args = setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = fn(*args)
+            seconds.append(time.perf_counter() - started)
+    return seconds, result
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_FOLDER,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Function to benchmark every stage for one workbook
+def benchmark_workbook(workbook, repeat=3):
+    timings = {}
+
+    timings['convert_excel_to_csv'], _ = time_stage(convert_excel_to_csv, lambda: (workbook, 'data.csv'), repeat)
+    raw_df = pd.read_csv(os.path.join(os.getcwd(), '../../assets', 'data.csv'))
+
+    timings['split_date_time'], split_df = time_stage(split_date_time, lambda: (raw_df.copy(),), repeat)
+    timings['clean_dataframe'], cleaned_df = time_stage(clean_dataframe, lambda: (split_df.copy(),), repeat)
+    timings['add_incremented_energy'], calculated_df = time_stage(
+        add_incremented_energy, lambda: (cleaned_df.copy(), INCREMENT_VALUE), repeat)
+    timings['calculate_daily_losses'], _ = time_stage(calculate_daily_losses, lambda: (calculated_df,), repeat)
+
+    days = day_numbers(cleaned_df['Date'])
+    start_date, end_date = day_number_to_date(days.min()), day_number_to_date(days.max())
+    timings['ingest_excel_to_store'], _ = time_stage(ingest_excel_to_store, lambda: (workbook,), repeat)
+    timings['run_pipeline'], _ = time_stage(
+        run_pipeline, lambda: (workbook, INCREMENT_VALUE, start_date, end_date), repeat)
+
+    return len(raw_df), timings
+
+def summarize(plant, rows, timings):
+    return [{
+        'plant': plant,
+        'stage': stage,
+        'rows': rows,
+        'median_seconds': median(seconds),
+        'min_seconds': min(seconds),
+        'seconds': seconds,
+    } for stage, seconds in timings.items()]
+
+# Function to print the change of every stage against an earlier results file
+def compare(results, baseline):
+    earlier = {(r['plant'], r['stage']): r['median_seconds'] for r in baseline['results']}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for r in results['results']:
+        before = earlier.get((r['plant'], r['stage']))
+        if before:
+            print(f"  {r['plant']:<20} {r['stage']:<24} {before:8.3f}s -> {r['median_seconds']:8.3f}s ({before / r['median_seconds']:.2f}x)")
+
+def run(plants=1, years=1, repeat=3, seed=0):
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        modules_folder = os.path.join(scratch, 'app', 'modules')
+        os.makedirs(modules_folder)
+        os.makedirs(os.path.join(scratch, 'assets'))
+
+        workbooks = write_workbooks(os.path.join(scratch, 'data'), plants, years, seed=seed)
+
+        working_folder = os.getcwd()
+        os.chdir(modules_folder)
+        try:
+            for workbook in workbooks:
+                plant = os.path.splitext(os.path.basename(workbook))[0]
+                rows, timings = benchmark_workbook(workbook, repeat)
+                results.extend(summarize(plant, rows, timings))
+                print(f"{plant}: {rows} rows, full path {median(timings['run_pipeline']):.3f}s")
+        finally:
+            os.chdir(working_folder)
+
+    return {
+        'commit': get_commit(),
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'config': {'plants': plants, 'years': years, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every stage of the loss analysis on synthetic data")
+    parser.add_argument('--plants', type=int, default=1, help="Number of synthetic plants")
+    parser.add_argument('--years', type=int, default=1, help="Years of 15-minute data per plant")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the data")
+    parser.add_argument('--output', type=str, default=None, help="Results file (default: 'benchmarks/results/<commit>.json')")
+    parser.add_argument('--baseline', type=str, default=None, help="Earlier results file to compare with")
+
+    args = parser.parse_args()
+
+    results = run(args.plants, args.years, args.repeat, args.seed)
+
+    output = args.output or os.path.join(BENCHMARKS_FOLDER, 'results', f"{results['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for r in results['results']:
+        print(f"  {r['plant']:<20} {r['stage']:<24} {r['median_seconds']:8.3f}s")
+    print(f"Results saved to '{output}'.")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+
+from run_benchmarks import REPO_FOLDER, BENCHMARKS_FOLDER, get_commit
+from generate_data import write_workbooks
+
+# Cold-start benchmark for the Streamlit entry point. Every case runs in a new
+# interpreter, the way the app starts after a container restart:
+#   python_startup   - an empty interpreter, the floor for everything else
+#   import_app       - the modules display.py imports before the first page
+#   import_plotly    - the chart library (deferred and warmed in the background)
+#   import_streamlit - the web framework itself
+#   first_click      - imports plus the first upload and calculation
+# The first_click child also reports a second, warm click in the same process,
+# which is what every later click costs in the long-lived server.
+
+MODULES_FOLDER = os.path.join(REPO_FOLDER, 'app', 'modules')
+
+APP_IMPORTS = (
+    "import pipeline, sensitivity, ingest_cache, day_index, workspace, schema, "
+    "incremental, plant, cleaning, charts, instrumentation, warmup"
+)
+
+FIRST_CLICK = APP_IMPORTS + """
+import sys, time, json
+from pipeline import load_cleaned_data, run_calculations
+from schema import day_numbers, day_number_to_date
+timings = {}
+for name in ('first_click', 'warm_click'):
+    started = time.perf_counter()
+    cleaned = load_cleaned_data(sys.argv[1])
+    days = day_numbers(cleaned['Date'])
+    run_calculations(cleaned, 5, day_number_to_date(days.min()), day_number_to_date(days.max()))
+    timings[name] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+CASES = {
+    'python_startup': "pass",
+    'import_app': APP_IMPORTS,
+    'import_plotly': "import plotly.graph_objects",
+    'import_streamlit': "import streamlit",
+}
+
+# Function to run code in a new interpreter and return (wall seconds, stdout), or None if it fails
+def run_child(code, *args):
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code, *args], cwd=MODULES_FOLDER, capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        return None
+    return seconds, completed.stdout
+
+def run(repeat=5):
+    timings = {}
+    for case, code in CASES.items():
+        runs = [run_child(code) for _ in range(repeat)]
+        if all(runs):
+            timings[case] = [seconds for seconds, _ in runs]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        workbook = write_workbooks(scratch, plants=1, years=1)[0]
+        for _ in range(repeat):
+            result = run_child(FIRST_CLICK, workbook)
+            if result is None:
+                break
+            seconds, stdout = result
+            child_timings = json.loads(stdout.strip().splitlines()[-1])
+            timings.setdefault('first_click', []).append(seconds - child_timings['warm_click'])
+            timings.setdefault('warm_click', []).append(child_timings['warm_click'])
+
+    return {
+        'commit': get_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'config': {'repeat': repeat},
+        'results': [{
+            'stage': case,
+            'median_seconds': median(seconds),
+            'min_seconds': min(seconds),
+            'seconds': seconds,
+        } for case, seconds in timings.items()],
+    }
+
+# Main entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold start and first-click latency of the app")
+    parser.add_argument('--repeat', type=int, default=5, help="New interpreters per case")
+    parser.add_argument('--output', type=str, default=None, help="Results file (default: 'benchmarks/results/startup-<commit>.json')")
+    parser.add_argument('--baseline', type=str, default=None, help="Earlier results file to compare with")
+
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    output = args.output or os.path.join(BENCHMARKS_FOLDER, 'results', f"startup-{results['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    earlier = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            earlier = {r['stage']: r['median_seconds'] for r in json.load(f)['results']}
+
+    for r in results['results']:
+        line = f"  {r['stage']:<18} {r['median_seconds']:8.3f}s"
+        if r['stage'] in earlier:
+            line += f"  (was {earlier[r['stage']]:.3f}s)"
+        print(line)
+    print(f"Results saved to '{output}'.")
@@ -1,27 +1,48 @@
 #!/bin/bash
 
-# Function to check if a Python package is installed
-check_and_install() {
-    package_name=$1
-    if python3 -c "import $package_name" &> /dev/null; then
-        echo "$package_name is already installed."
-    else
-        echo "$package_name is not installed. Installing..."
-        pip install $package_name
-    fi
+# List of required packages
+REQUIRED_PACKAGES=("streamlit" "pandas" "plotly" "numpy" "pyarrow" "openpyxl")
+
+# The check is skipped when nothing changed since it last passed: the stamp is
+# keyed on the interpreter, the package list and the site-packages folders
+# (installing or removing a package changes their modification time)
+STAMP_FOLDER="${XDG_CACHE_HOME:-$HOME/.cache}/loss_analyzer"
+
+environment_key() {
+    python3 - "${REQUIRED_PACKAGES[@]}" <<'EOF'
+import sys, os, site, hashlib
+paths = site.getsitepackages() + [site.getusersitepackages()]
+mtimes = [f"{p}:{os.stat(p).st_mtime_ns}" for p in paths if os.path.isdir(p)]
+print(hashlib.sha256("\n".join([sys.executable, sys.version] + sys.argv[1:] + mtimes).encode()).hexdigest()[:16])
+EOF
+}
+
+# Function to list the required packages that are not installed, without importing them
+missing_packages() {
+    python3 - "${REQUIRED_PACKAGES[@]}" <<'EOF'
+import sys, importlib.util
+print(" ".join(p for p in sys.argv[1:] if importlib.util.find_spec(p) is None))
+EOF
 }
 
 echo "Checking required dependencies..."
 
-# List of required packages
-REQUIRED_PACKAGES=("streamlit" "pandas" "plotly" "numpy")
+stamp_file="$STAMP_FOLDER/deps-$(environment_key)"
+if [ -f "$stamp_file" ]; then
+    echo "Dependencies unchanged since the last check."
+else
+    missing=$(missing_packages)
+    if [ -n "$missing" ]; then
+        echo "Installing missing packages: $missing"
+        pip install $missing || { echo "Could not install the dependencies!"; exit 1; }
+    fi
 
-# Check and install each package
-for package in "${REQUIRED_PACKAGES[@]}"; do
-    check_and_install $package
-done
+    # Installing changes the environment, so the stamp is written for the new key
+    mkdir -p "$STAMP_FOLDER" && touch "$STAMP_FOLDER/deps-$(environment_key)"
+    echo "All dependencies are installed."
+fi
 
-echo "All dependencies are installed. Running the application..."
+echo "Running the application..."
 
 # Navigate to the target directory
 cd app/modules || { echo "Directory not found!"; exit 1; }